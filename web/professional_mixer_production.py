@@ -7,21 +7,33 @@ Real audio processing with S3 integration for AWS Lambda
 import json
 import os
 import sys
+import subprocess
 import tempfile
 import uuid
 import logging
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Optional, Any
 
 # Import our custom modules
 from audio_processor import ProfessionalAudioProcessor
-from s3_manager import S3Manager
+from s3_manager import S3Manager, S3_TRANSFER_CONFIG
 from metrics_handler import ProcessingMetrics, track_processing_metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
+def _ffmpeg_available() -> bool:
+    """Probe for FFmpeg once per container; the answer cannot change while warm"""
+    try:
+        result = subprocess.run(['ffmpeg', '-version'], 
+                              capture_output=True, text=True, timeout=5)
+        return result.returncode == 0
+    except Exception:
+        return False
+
 class ProductionMixer:
     """Production-ready professional audio mixer"""
     
@@ -29,6 +41,7 @@ class ProductionMixer:
         self.s3_manager = S3Manager()
         self.audio_processor = None
         self.session_id = None
+        self._chain_desc = ''
         
         # Ensure S3 bucket exists
         self.s3_manager.ensure_bucket_exists()
@@ -45,6 +58,7 @@ class ProductionMixer:
             
             # Initialize audio processor
             self.audio_processor = ProfessionalAudioProcessor()
+            self._chain_desc = self.audio_processor.processing_chains.get(theme, {}).get('description', '')
             
             # Step 1: Load and analyze audio
             logger.info("Step 1: Loading and analyzing audio")
@@ -96,26 +110,23 @@ class ProductionMixer:
             # Extract episode number from URL (basic extraction)
             episode_number = self._extract_episode_number(episode_url)
             
-            # Stream directly to S3 without saving to disk
-            import io
+            # Stream the mix file to S3
             mix_key = f"mixes/{episode_number}/{theme.replace(' ', '_')}_{uuid.uuid4().hex[:8]}.mp3"
             
             try:
-                # Export to BytesIO buffer
-                with io.BytesIO() as buf:
-                    # Get file size before streaming
-                    file_size = os.path.getsize(mix_file_path)
-                    
-                    # Read the mix file and stream to S3
-                    with open(mix_file_path, 'rb') as f:
-                        self.s3_manager.s3_client.upload_fileobj(
-                            f, 
-                            self.s3_manager.bucket_name, 
-                            mix_key,
-                            ExtraArgs={'ContentType': 'audio/mpeg'}
-                        )
-                    
-                    logger.info(f"Streamed mix to S3: {mix_key}")
+                # Stat the local mix once; reused for metrics and the response
+                file_size = os.path.getsize(mix_file_path)
+                
+                with open(mix_file_path, 'rb') as f:
+                    self.s3_manager.s3_client.upload_fileobj(
+                        f, 
+                        self.s3_manager.bucket_name, 
+                        mix_key,
+                        ExtraArgs={'ContentType': 'audio/mpeg'},
+                        Config=S3_TRANSFER_CONFIG
+                    )
+                
+                logger.info(f"Streamed mix to S3: {mix_key}")
                 
                 # Generate presigned URL
                 presigned_url = self.s3_manager.generate_presigned_url(mix_key, expiration=86400)
@@ -141,11 +152,25 @@ class ProductionMixer:
             metrics.end_timer("total_processing")
             metrics.track_mix_creation(theme, len(segments), 
                                      analysis.get('duration', 0), 
-                                     upload_result.get('file_size', 0))
+                                     file_size)
             
             # Emit metrics to CloudWatch
             metrics.emit_metrics()
             
+            # Project segments and total their confidence in a single pass
+            total_confidence = 0.0
+            segment_list = []
+            for seg in segments:
+                confidence = seg.get('confidence', 0)
+                total_confidence += confidence
+                segment_list.append({
+                    'name': seg['name'],
+                    'start_time': seg['timestamp'],
+                    'duration': seg.get('duration', 20),
+                    'confidence': confidence,
+                    'description': seg.get('description', '')
+                })
+            
             response = {
                 'status': 'success',
                 'session_id': self.session_id,
@@ -170,21 +195,12 @@ class ProductionMixer:
                     'audio_duration': analysis.get('duration', 0),
                     'segments_selected': len(segments),
                     'selection_method': segments[0].get('selection_method', 'unknown') if segments else 'none',
-                    'average_confidence': sum(s.get('confidence', 0) for s in segments) / len(segments) if segments else 0,
+                    'average_confidence': total_confidence / len(segment_list) if segment_list else 0,
                     'tempo': analysis.get('tempo', 0),
                     'energy_score': analysis.get('rms_energy_mean', 0)
                 },
-                'segments': [
-                    {
-                        'name': seg['name'],
-                        'start_time': seg['timestamp'],
-                        'duration': seg.get('duration', 20),
-                        'confidence': seg.get('confidence', 0),
-                        'description': seg.get('description', '')
-                    }
-                    for seg in segments
-                ],
-                'processing_chain': self.audio_processor.processing_chains.get(theme, {}).get('description', ''),
+                'segments': segment_list,
+                'processing_chain': self._chain_desc,
                 'message': f'Professional mix created successfully with {len(segments)} segments'
             }
             
@@ -249,7 +265,7 @@ class ProductionMixer:
         """Health check for the production mixer"""
         try:
             # Check S3 connectivity
-            bucket_accessible = self.s3_manager.ensure_bucket_exists()
+            bucket_accessible = self.s3_manager.ensure_bucket_exists(force=True)
             
             # Check audio processing capabilities
             import librosa
@@ -276,13 +292,7 @@ class ProductionMixer:
     
     def _check_ffmpeg(self) -> bool:
         """Check if FFmpeg is available"""
-        try:
-            import subprocess
-            result = subprocess.run(['ffmpeg', '-version'], 
-                                  capture_output=True, text=True, timeout=5)
-            return result.returncode == 0
-        except Exception:
-            return False
+        return _ffmpeg_available()
 
 def lambda_handler(event, context):
     """AWS Lambda handler for production professional mixing"""
@@ -319,7 +329,8 @@ def lambda_handler(event, context):
             result = mixer.get_mix_history(episode_number)
         else:
             # Main mixing endpoint
-            body = json.loads(event.get('body', '{}'))
+            raw_body = event.get('body')
+            body = json.loads(raw_body) if raw_body else {}
             
             episode_url = body.get('episode_url', 'https://op3.dev/e/mp3s.nashownotes.com/NA-1779-2025-07-06-Final.mp3')
             theme = body.get('theme', 'Best Of')
@@ -345,7 +356,7 @@ def lambda_handler(event, context):
                 'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
                 'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
             },
-            'body': json.dumps(result, indent=2)
+            'body': json.dumps(result, separators=(',', ':'))
         }
     
     except Exception as e:
@@ -361,7 +372,7 @@ def lambda_handler(event, context):
                 'message': str(e),
                 'type': 'lambda_error',
                 'timestamp': datetime.now().isoformat()
-            })
+            }, separators=(',', ':'))
         }
 
 if __name__ == '__main__':
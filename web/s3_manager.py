@@ -5,22 +5,38 @@ Handles file uploads, downloads, and presigned URL generation
 """
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 import json
 import os
 import tempfile
 import logging
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+# Larger keep-alive pool and adaptive retries for bursty concurrent uploads
+S3_CLIENT_CONFIG = Config(
+    max_pool_connections=32,
+    retries={'max_attempts': 5, 'mode': 'adaptive'},
+    tcp_keepalive=True,
+    signature_version='s3v4'
+)
+
+# Shared transfer settings: read files in 1 MiB chunks instead of the 256 KiB default
+S3_TRANSFER_CONFIG = TransferConfig(io_chunksize=1 << 20)
+
+# Buckets already confirmed in this container; survives across warm Lambda invocations
+_BUCKET_VERIFIED = set()
+
 class S3Manager:
     """Handles S3 operations for audio files and mix outputs"""
     
     def __init__(self, bucket_name: str = None):
         self.bucket_name = bucket_name or os.environ.get('S3_BUCKET', 'noagenda-mixer-storage')
-        self.s3_client = boto3.client('s3')
+        self.s3_client = boto3.client('s3', config=S3_CLIENT_CONFIG)
         
         # S3 prefixes for organization
         self.prefixes = {
@@ -30,11 +46,18 @@ class S3Manager:
             'temp': 'temp/'
         }
     
-    def ensure_bucket_exists(self) -> bool:
-        """Ensure the S3 bucket exists, create if necessary"""
+    def ensure_bucket_exists(self, force: bool = False) -> bool:
+        """Ensure the S3 bucket exists, create if necessary
+        
+        force=True skips the per-container cache and always probes S3.
+        """
+        if not force and self.bucket_name in _BUCKET_VERIFIED:
+            return True
+        
         try:
             self.s3_client.head_bucket(Bucket=self.bucket_name)
             logger.info(f"S3 bucket {self.bucket_name} exists")
+            _BUCKET_VERIFIED.add(self.bucket_name)
             return True
         except ClientError as e:
             error_code = e.response['Error']['Code']
@@ -42,12 +65,14 @@ class S3Manager:
                 try:
                     self.s3_client.create_bucket(Bucket=self.bucket_name)
                     logger.info(f"Created S3 bucket {self.bucket_name}")
+                    _BUCKET_VERIFIED.add(self.bucket_name)
                     return True
                 except ClientError as create_error:
                     logger.error(f"Failed to create bucket: {create_error}")
                     return False
             else:
                 logger.error(f"Error checking bucket: {e}")
+                _BUCKET_VERIFIED.discard(self.bucket_name)
                 return False
     
     def upload_file(self, local_path: str, s3_key: str, content_type: str = None) -> bool:
@@ -61,7 +86,8 @@ class S3Manager:
                 local_path, 
                 self.bucket_name, 
                 s3_key,
-                ExtraArgs=extra_args
+                ExtraArgs=extra_args,
+                Config=S3_TRANSFER_CONFIG
             )
             logger.info(f"Uploaded {local_path} to s3://{self.bucket_name}/{s3_key}")
             return True
@@ -72,7 +98,9 @@ class S3Manager:
     def download_file(self, s3_key: str, local_path: str) -> bool:
         """Download a file from S3"""
         try:
-            self.s3_client.download_file(self.bucket_name, s3_key, local_path)
+            self.s3_client.download_file(
+                self.bucket_name, s3_key, local_path, Config=S3_TRANSFER_CONFIG
+            )
             logger.info(f"Downloaded s3://{self.bucket_name}/{s3_key} to {local_path}")
             return True
         except Exception as e:
@@ -163,7 +191,8 @@ class S3Manager:
                 file_obj,
                 self.bucket_name,
                 s3_key,
-                ExtraArgs=extra_args
+                ExtraArgs=extra_args,
+                Config=S3_TRANSFER_CONFIG
             )
             logger.info(f"Streamed upload to s3://{self.bucket_name}/{s3_key}")
             return True
@@ -177,27 +206,42 @@ class S3Manager:
             from datetime import timezone
             cutoff_time = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
             
-            response = self.s3_client.list_objects_v2(
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            pages = paginator.paginate(
                 Bucket=self.bucket_name,
                 Prefix=self.prefixes['temp']
             )
             
-            if 'Contents' in response:
-                delete_keys = []
-                for obj in response['Contents']:
+            deleted = 0
+            delete_keys = []
+            for page in pages:
+                for obj in page.get('Contents', []):
                     if obj['LastModified'] < cutoff_time:
                         delete_keys.append({'Key': obj['Key']})
-                
-                if delete_keys:
-                    self.s3_client.delete_objects(
-                        Bucket=self.bucket_name,
-                        Delete={'Objects': delete_keys}
-                    )
-                    logger.info(f"Cleaned up {len(delete_keys)} temporary files")
+                    
+                    # S3 accepts at most 1000 keys per delete_objects request
+                    if len(delete_keys) == 1000:
+                        self._delete_keys(delete_keys)
+                        deleted += len(delete_keys)
+                        delete_keys = []
+            
+            if delete_keys:
+                self._delete_keys(delete_keys)
+                deleted += len(delete_keys)
+            
+            if deleted:
+                logger.info(f"Cleaned up {deleted} temporary files")
             
         except Exception as e:
             logger.error(f"Failed to cleanup temp files: {e}")
     
+    def _delete_keys(self, keys: list):
+        """Delete a batch of up to 1000 keys without echoing them back"""
+        self.s3_client.delete_objects(
+            Bucket=self.bucket_name,
+            Delete={'Objects': keys, 'Quiet': True}
+        )
+    
     def get_mix_metadata(self, s3_key: str) -> Optional[Dict[str, Any]]:
         """Get metadata for a mix file"""
         try:
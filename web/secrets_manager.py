@@ -4,11 +4,19 @@ AWS Secrets Manager integration for No Agenda Mixer
 import os
 import json
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive connections and adaptive retries for Secrets Manager calls
+SECRETS_CLIENT_CONFIG = Config(
+    max_pool_connections=32,
+    retries={'max_attempts': 5, 'mode': 'adaptive'},
+    tcp_keepalive=True
+)
+
 class SecretsManager:
     def __init__(self, region_name='us-east-1'):
         self.region_name = region_name
@@ -20,7 +28,8 @@ class SecretsManager:
         if not self.secrets_client:
             self.secrets_client = boto3.client(
                 'secretsmanager',
-                region_name=self.region_name
+                region_name=self.region_name,
+                config=SECRETS_CLIENT_CONFIG
             )
         return self.secrets_client
     
@@ -60,6 +69,14 @@ class SecretsManager:
             logger.error(f"Unexpected error retrieving secret {secret_name}: {e}")
             raise
 
+# Shared by every caller in the process, so they reuse one client and one
+# secret cache instead of each paying for its own GetSecretValue call
+_SM = SecretsManager()
+
+def get_secrets_manager():
+    """Return the process-wide SecretsManager and its secret cache"""
+    return _SM
+
 def load_secrets_to_env():
     """Load secrets from AWS Secrets Manager into environment variables"""
     # Only load from Secrets Manager if running in Lambda
@@ -67,8 +84,7 @@ def load_secrets_to_env():
         logger.info("Running in Lambda, loading secrets from AWS Secrets Manager")
         
         try:
-            sm = SecretsManager()
-            secrets = sm.get_secret('no-agenda-mixer/api-keys')
+            secrets = _SM.get_secret('no-agenda-mixer/api-keys')
             
             # Set environment variables from secrets
             for key, value in secrets.items():
@@ -5,7 +5,6 @@ Setup AWS Secrets Manager with API keys for No Agenda Mixer
 import os
 import json
 import boto3
-from dotenv import load_dotenv
 import sys
 
 def create_or_update_secret(client, secret_name, secret_data, region='us-east-1'):
@@ -35,12 +34,14 @@ def main():
     """Setup all required secrets"""
     print("🔐 Setting up AWS Secrets Manager for No Agenda Mixer\n")
     
-    # Load environment variables
-    env_path = '../config/.env'
-    if os.path.exists(env_path):
-        load_dotenv(env_path)
-    else:
-        load_dotenv('.env')
+    # Load environment variables; Lambda already provides its own environment
+    if not os.getenv('AWS_LAMBDA_FUNCTION_NAME'):
+        from dotenv import load_dotenv
+        
+        env_path = '../config/.env'
+        if not os.path.exists(env_path):
+            env_path = '.env'
+        load_dotenv(env_path, override=False)
     
     # Get API keys
     grok_api_key = os.getenv('GROK_API_KEY')
@@ -53,8 +54,7 @@ def main():
     
     # Initialize AWS client
     try:
-        session = boto3.Session()
-        region = session.region_name or 'us-east-1'
+        region = os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION') or 'us-east-1'
         secrets_client = boto3.client('secretsmanager', region_name=region)
         print(f"📍 Using AWS region: {region}\n")
     except Exception as e:
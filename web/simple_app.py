@@ -1,41 +1,208 @@
+import concurrent.futures
 import json
+import logging
 import os
-from datetime import datetime
+import re
+from datetime import datetime, timezone
+from decimal import Decimal
 import uuid
 
-# Global session storage (in a real app, use DynamoDB or S3)
+import boto3
+import requests
+from botocore.config import Config
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Lambda's root logger ships to CloudWatch; tracebacks go there, not to clients
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# DEBUG=1 includes raw FAL.ai / GROK responses in API output
+DEBUG = os.environ.get('DEBUG') == '1'
+
+# Sessions live in DynamoDB when SESSIONS_TABLE is set, so every Lambda
+# container sees the same data; the dict is only a fallback for local runs
+SESSIONS_TABLE = os.environ.get('SESSIONS_TABLE')
 sessions = {}
+_SESSIONS_TABLE = None
+
+# Shared HTTP session so FAL.ai and GROK calls reuse warm TLS connections
+_HTTP = requests.Session()
+_HTTP.mount('https://', HTTPAdapter(
+    pool_connections=50,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+_HTTP.headers.update({'Content-Type': 'application/json'})
+
+# Region comes straight from the Lambda environment, skipping boto3's config-file lookup
+AWS_REGION = os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION') or 'us-east-1'
+
+# Short timeouts and few retries so a slow AWS call fails fast instead of
+# holding the container for minutes on botocore's 60s defaults
+_BOTO_CFG = Config(
+    connect_timeout=1,
+    read_timeout=2,
+    retries={'max_attempts': 2, 'mode': 'standard'},
+    max_pool_connections=50
+)
+
+# Secrets Manager client, created once per Lambda container
+_SECRETS_CLIENT = None
+
+# Set once the secrets have been copied into the environment
+_SECRETS_LOADED = False
+
+# Parsed secret values; read before falling back to the environment
+_CONFIG = {}
+
+# Secrets fetched together in a single BatchGetSecretValue call (max 20 ids)
+_SECRET_IDS = ['no-agenda-mixer/api-keys']
+
+def _get_sessions_table():
+    """Get or create the DynamoDB sessions table resource"""
+    global _SESSIONS_TABLE
+    if _SESSIONS_TABLE is None:
+        _SESSIONS_TABLE = boto3.resource('dynamodb', region_name=AWS_REGION, config=_BOTO_CFG).Table(SESSIONS_TABLE)
+    return _SESSIONS_TABLE
+
+def _to_dynamo(item):
+    """Convert floats to Decimal, which is the only number type DynamoDB accepts"""
+    return json.loads(json.dumps(item), parse_float=Decimal)
+
+def _from_decimal(value):
+    """Turn a DynamoDB Decimal back into the int or float that was stored"""
+    return int(value) if value == value.to_integral_value() else float(value)
+
+def _decimal_default(obj):
+    """json.dumps fallback for the Decimal values DynamoDB returns"""
+    if isinstance(obj, Decimal):
+        return _from_decimal(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dumps(obj):
+    """Serialize a response body as compact JSON"""
+    return json.dumps(obj, separators=(',', ':'), default=_decimal_default)
+
+def save_session(session):
+    """Store a new session"""
+    if SESSIONS_TABLE:
+        _get_sessions_table().put_item(Item=_to_dynamo(session))
+    else:
+        sessions[session['session_id']] = session
+
+def get_session(session_id):
+    """Fetch a session by id, or None if it does not exist"""
+    if SESSIONS_TABLE:
+        session = _get_sessions_table().get_item(Key={'session_id': session_id}).get('Item')
+        # DynamoDB returns numbers as Decimal; only those need converting,
+        # whatever the client originally sent (even null) is passed through
+        if session is not None and isinstance(session.get('episode_number'), Decimal):
+            session['episode_number'] = _from_decimal(session['episode_number'])
+        return session
+    return sessions.get(session_id)
+
+def append_to_session(session_id, field, item):
+    """Append an item to one of a session's list fields"""
+    if SESSIONS_TABLE:
+        # list_append updates in place, so there is no read-modify-write race
+        _get_sessions_table().update_item(
+            Key={'session_id': session_id},
+            UpdateExpression='SET #f = list_append(if_not_exists(#f, :empty), :item)',
+            ExpressionAttributeNames={'#f': field},
+            ExpressionAttributeValues={':item': [_to_dynamo(item)], ':empty': []}
+        )
+    elif session_id in sessions:
+        sessions[session_id][field].append(item)
+
+# Response headers shared by every route; never mutated per request
+_JSON_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+_CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+}
+_OPTIONS_RESPONSE = {
+    'statusCode': 200,
+    'headers': _CORS_HEADERS,
+    'body': ''
+}
+
+# Static body for GET /, serialized once at import
+_ROOT_BODY = _dumps({
+    'message': 'No Agenda Mixer API is running!',
+    'version': '1.0',
+    'endpoints': [
+        'GET /',
+        'GET /health',
+        'POST /api/start_session',
+        'POST /api/generate_ideas/{session_id}',
+        'POST /api/generate_all/{session_id}',
+        'GET /api/session/{session_id}'
+    ]
+})
+
+# Music prompts per mix theme; 'Custom' doubles as the fallback
+_THEME_PROMPTS = {
+    'Best Of': 'Upbeat electronic podcast intro music with energetic synth melody, 128 BPM, perfect for highlighting the best moments',
+    'Conspiracy Corner': 'Dark ambient electronic music with mysterious undertones, glitch effects, and conspiracy theory vibes, 100 BPM',
+    'Media Meltdown': 'Chaotic breakbeat electronic music with news broadcast samples, media criticism energy, and distortion effects, 140 BPM',
+    'Donation Nation': 'Celebratory fanfare music with cash register sounds, applause, and triumphant horn sections, 120 BPM',
+    'Musical Mayhem': 'Experimental electronic collage with vocal chops, random beats, and unpredictable sound design, 130 BPM',
+    'Custom': 'Creative podcast background music with modern electronic elements, suitable for audio mixing, 125 BPM'
+}
+_DEFAULT_PROMPT = _THEME_PROMPTS['Custom']
+
+# GROK ideas prompt; filled per request with str.format(episode=..., theme=...)
+_GROK_PROMPT_TMPL = """Create creative mix ideas for No Agenda Episode {episode} with theme "{theme}".
+
+Generate 3 types of ideas:
+1. Mix Concept: Overall creative vision for the mix
+2. Segment Ideas: 5-6 specific segments with timestamps (spread throughout 3-hour show)
+3. Music Prompts: 3 AI music prompts that would complement this theme
+
+Be specific, creative, and capture the No Agenda podcast vibe. Include timestamps like 1:22:30 format.
+
+Return as JSON:
+{{
+    "mix_concept": "...",
+    "segments": [
+        {{"name": "...", "timestamp": "HH:MM:SS", "duration": 15, "description": "..."}},
+        ...
+    ],
+    "music_prompts": ["...", "...", "..."]
+}}
+"""
+
+def _utc_now():
+    """Current UTC time as a timezone-aware ISO 8601 string"""
+    return datetime.now(timezone.utc).isoformat()
+
+def get_config(key, default=None):
+    """Look up a setting from the loaded secrets, falling back to the environment for local dev"""
+    return _CONFIG.get(key) or os.getenv(key, default)
 
 def get_music_prompt_for_theme(theme):
     """Generate music prompts based on theme"""
-    prompts = {
-        'Best Of': 'Upbeat electronic podcast intro music with energetic synth melody, 128 BPM, perfect for highlighting the best moments',
-        'Conspiracy Corner': 'Dark ambient electronic music with mysterious undertones, glitch effects, and conspiracy theory vibes, 100 BPM',
-        'Media Meltdown': 'Chaotic breakbeat electronic music with news broadcast samples, media criticism energy, and distortion effects, 140 BPM',
-        'Donation Nation': 'Celebratory fanfare music with cash register sounds, applause, and triumphant horn sections, 120 BPM',
-        'Musical Mayhem': 'Experimental electronic collage with vocal chops, random beats, and unpredictable sound design, 130 BPM',
-        'Custom': 'Creative podcast background music with modern electronic elements, suitable for audio mixing, 125 BPM'
-    }
-    
-    return prompts.get(theme, prompts['Custom'])
+    return _THEME_PROMPTS.get(theme, _DEFAULT_PROMPT)
 
-def generate_music_with_fal(prompt):
+def generate_music_with_fal(prompt, created_at=None):
     """Generate music using FAL.ai API"""
     try:
         # Get FAL API key from environment (loaded from secrets)
-        fal_key = os.getenv('FAL_API_KEY')
+        fal_key = get_config('FAL_API_KEY')
         if not fal_key:
             print("FAL_API_KEY not available")
             raise Exception("FAL_API_KEY not configured")
         
-        import requests
-        
         print(f"Generating music with FAL.ai: {prompt}")
         
         # FAL.ai API call using the correct endpoint
         headers = {
-            'Authorization': f'Key {fal_key}',
-            'Content-Type': 'application/json'
+            'Authorization': f'Key {fal_key}'
         }
         
         payload = {
@@ -44,7 +211,7 @@ def generate_music_with_fal(prompt):
         }
         
         # Use the correct FAL.ai endpoint for music generation
-        response = requests.post(
+        response = _HTTP.post(
             'https://fal.run/fal-ai/stable-audio',
             headers=headers,
             json=payload,
@@ -57,15 +224,22 @@ def generate_music_with_fal(prompt):
             result = response.json()
             print(f"FAL.ai success: {result}")
             
-            return {
+            audio = result.get('audio') or {}
+            
+            music = {
                 'id': str(uuid.uuid4()),
                 'prompt': prompt,
-                'created_at': datetime.utcnow().isoformat(),
+                'created_at': created_at or _utc_now(),
                 'status': 'completed',
-                'audio_url': result.get('audio_url') or result.get('audio', {}).get('url'),
-                'duration': 30,
-                'fal_response': result
+                'audio_url': result.get('audio_url') or audio.get('url'),
+                'duration': 30
             }
+            
+            # Raw upstream payloads are large; only echo them when debugging
+            if DEBUG:
+                music['fal_response'] = result
+            
+            return music
         else:
             error_text = response.text
             print(f"FAL.ai API error: {response.status_code} - {error_text}")
@@ -75,56 +249,35 @@ def generate_music_with_fal(prompt):
         print(f"Error calling FAL.ai: {e}")
         raise e
 
-def generate_ideas_with_grok(episode_number, theme):
+def generate_ideas_with_grok(episode_number, theme, created_at=None):
     """Generate mix ideas using GROK AI"""
     try:
         # Get GROK API key from environment (loaded from secrets)
-        grok_key = os.getenv('GROK_API_KEY')
+        grok_key = get_config('GROK_API_KEY')
         if not grok_key:
             print("GROK_API_KEY not available")
             raise Exception("GROK_API_KEY not configured")
         
-        import requests
-        
         print(f"Generating ideas with GROK for Episode {episode_number}, Theme: {theme}")
         
         # GROK AI API call
         headers = {
-            'Authorization': f'Bearer {grok_key}',
-            'Content-Type': 'application/json'
+            'Authorization': f'Bearer {grok_key}'
         }
         
-        prompt = f"""Create creative mix ideas for No Agenda Episode {episode_number} with theme "{theme}".
-        
-        Generate 3 types of ideas:
-        1. Mix Concept: Overall creative vision for the mix
-        2. Segment Ideas: 5-6 specific segments with timestamps (spread throughout 3-hour show)
-        3. Music Prompts: 3 AI music prompts that would complement this theme
-        
-        Be specific, creative, and capture the No Agenda podcast vibe. Include timestamps like 1:22:30 format.
-        
-        Return as JSON:
-        {{
-            "mix_concept": "...",
-            "segments": [
-                {{"name": "...", "timestamp": "HH:MM:SS", "duration": 15, "description": "..."}},
-                ...
-            ],
-            "music_prompts": ["...", "...", "..."]
-        }}
-        """
+        prompt = _GROK_PROMPT_TMPL.format(episode=episode_number, theme=theme)
         
         payload = {
             'messages': [
                 {'role': 'user', 'content': prompt}
             ],
-            'model': os.getenv('GROK_MODEL', 'grok-3-latest'),
+            'model': get_config('GROK_MODEL', 'grok-3-latest'),
             'response_format': {'type': 'json_object'},
             'temperature': 0.8
         }
         
-        response = requests.post(
-            f"{os.getenv('GROK_API_URL', 'https://api.x.ai/v1')}/chat/completions",
+        response = _HTTP.post(
+            f"{get_config('GROK_API_URL', 'https://api.x.ai/v1')}/chat/completions",
             headers=headers,
             json=payload,
             timeout=60
@@ -139,15 +292,19 @@ def generate_ideas_with_grok(episode_number, theme):
             
             print(f"GROK success: Generated ideas")
             
-            return {
+            generation = {
                 'id': str(uuid.uuid4()),
                 'episode_number': episode_number,
                 'theme': theme,
-                'created_at': datetime.utcnow().isoformat(),
+                'created_at': created_at or _utc_now(),
                 'status': 'completed',
-                'ideas': ideas,
-                'grok_response': result
+                'ideas': ideas
             }
+            
+            if DEBUG:
+                generation['grok_response'] = result
+            
+            return generation
         else:
             error_text = response.text
             print(f"GROK API error: {response.status_code} - {error_text}")
@@ -159,283 +316,334 @@ def generate_ideas_with_grok(episode_number, theme):
 
 def load_secrets():
     """Load secrets from AWS Secrets Manager"""
+    global _SECRETS_CLIENT, _SECRETS_LOADED
+    if _SECRETS_LOADED:
+        return
+    
     if os.getenv('AWS_LAMBDA_FUNCTION_NAME'):
         try:
-            import boto3
-            secrets_client = boto3.client('secretsmanager')
+            if _SECRETS_CLIENT is None:
+                _SECRETS_CLIENT = boto3.client('secretsmanager', region_name=AWS_REGION, config=_BOTO_CFG)
             
-            secret_response = secrets_client.get_secret_value(
-                SecretId='no-agenda-mixer/api-keys'
+            secret_response = _SECRETS_CLIENT.batch_get_secret_value(
+                SecretIdList=_SECRET_IDS
             )
             
-            secrets = json.loads(secret_response['SecretString'])
+            for error in secret_response.get('Errors', []):
+                print(f"Failed to load secret {error.get('SecretId')}: {error.get('Message')}")
+            
+            loaded = set()
+            for secret_value in secret_response.get('SecretValues', []):
+                _CONFIG.update(json.loads(secret_value['SecretString']))
+                loaded.add(secret_value['Name'])
             
-            # Set environment variables
-            for key, value in secrets.items():
-                os.environ[key] = value
-                print(f"Loaded secret: {key}")
+            print(f"Loaded secrets: {', '.join(_CONFIG)}")
+            
+            # A partial batch leaves the flag unset so the next invocation
+            # retries instead of running without the missing keys for good
+            _SECRETS_LOADED = loaded.issuperset(_SECRET_IDS)
                 
         except Exception as e:
             print(f"Failed to load secrets: {e}")
 
-def lambda_handler(event, context):
-    """Simple Lambda handler for testing"""
-    
+def _parse_body(event):
+    """Decode the request body, which may be absent, a JSON string, or already a dict"""
+    body = event.get('body')
+    if body is None or body == '':
+        return {}
+    if isinstance(body, dict):
+        return body
     try:
-        # Load secrets from AWS Secrets Manager
-        load_secrets()
-        
-        # Log the event
-        print(f"Event: {json.dumps(event)}")
-        
-        # Handle CORS preflight requests
-        if event.get('httpMethod') == 'OPTIONS':
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-                },
-                'body': ''
-            }
-        
-        # Simple routing
-        path = event.get('path', '/')
-        method = event.get('httpMethod', 'GET')
-        
-        if path == '/' and method == 'GET':
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'message': 'No Agenda Mixer API is running!',
-                    'version': '1.0',
-                    'endpoints': [
-                        'GET /',
-                        'GET /health',
-                        'POST /api/start_session',
-                        'POST /api/generate_ideas/{session_id}',
-                        'GET /api/session/{session_id}'
-                    ]
-                })
-            }
+        parsed = json.loads(body)
+    except (TypeError, ValueError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+def _root(event, now):
+    """GET / - API banner"""
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _ROOT_BODY
+    }
+
+def _health(event, now):
+    """GET /health - report which API keys are configured"""
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _dumps({
+            'status': 'healthy',
+            'timestamp': '2025-07-06T20:00:00Z',
+            'has_grok_key': bool(get_config('GROK_API_KEY')),
+            'has_fal_key': bool(get_config('FAL_API_KEY'))
+        })
+    }
+
+def _start_session(event, now):
+    """POST /api/start_session - create a new mixing session"""
+    # Parse body
+    body = _parse_body(event)
     
-        elif path == '/health' and method == 'GET':
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'status': 'healthy',
-                    'timestamp': '2025-07-06T20:00:00Z',
-                    'has_grok_key': bool(os.getenv('GROK_API_KEY')),
-                    'has_fal_key': bool(os.getenv('FAL_API_KEY'))
-                })
-            }
+    session_id = str(uuid.uuid4())
     
-        elif path == '/api/start_session' and method == 'POST':
-        # Parse body
-        try:
-            body = json.loads(event.get('body', '{}'))
-        except:
-            body = {}
-        
-        session_id = str(uuid.uuid4())
-        
-        # Create session object
-        session = {
+    # Create session object
+    session = {
+        'session_id': session_id,
+        'created_at': now,
+        'episode_number': body.get('episode_number', 1779),
+        'theme': body.get('theme', 'Best Of'),
+        'status': 'started',
+        'ideas': [],
+        'music_generations': [],
+        'clips': [],
+        'logs': []
+    }
+    
+    # Store session
+    save_session(session)
+    
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _dumps({
             'session_id': session_id,
-            'created_at': datetime.utcnow().isoformat(),
-            'episode_number': body.get('episode_number', 1779),
-            'theme': body.get('theme', 'Best Of'),
             'status': 'started',
-            'ideas': [],
-            'music_generations': [],
-            'clips': [],
-            'logs': []
-        }
-        
-        # Store session
-        sessions[session_id] = session
-        
+            'episode': session['episode_number'],
+            'theme': session['theme']
+        })
+    }
+
+def _get_session(event, session_id, now):
+    """GET /api/session/{session_id} - return the stored session"""
+    session = get_session(session_id)
+    if session:
         return {
             'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'session_id': session_id,
-                'status': 'started',
-                'episode': session['episode_number'],
-                'theme': session['theme']
+            'headers': _JSON_HEADERS,
+            'body': _dumps(session)
+        }
+    else:
+        return {
+            'statusCode': 404,
+            'headers': _JSON_HEADERS,
+            'body': _dumps({'error': 'Session not found'})
+        }
+
+def _gen_music(event, session_id, now):
+    """POST /api/generate_music/{session_id} - generate music with FAL.ai"""
+    body = _parse_body(event)
+    
+    # For testing, use default values if session not found
+    session = get_session(session_id)
+    if not session:
+        theme = "Media Meltdown"
+        print(f"Session {session_id} not found, using default theme: {theme}")
+    else:
+        theme = session['theme']
+    
+    prompt = body.get('prompt') or get_music_prompt_for_theme(theme)
+    
+    # Generate real music with FAL.ai
+    try:
+        music_generation = generate_music_with_fal(prompt, now)
+    except Exception as e:
+        # Return error instead of mock
+        return {
+            'statusCode': 500,
+            'headers': _JSON_HEADERS,
+            'body': _dumps({
+                'error': f'Music generation failed: {str(e)}',
+                'prompt': prompt
             })
         }
     
-        elif path.startswith('/api/session/') and method == 'GET':
-        # Extract session ID from path
-        session_id = path.split('/')[-1]
-        
-        if session_id in sessions:
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps(sessions[session_id])
-            }
-        else:
-            return {
-                'statusCode': 404,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'Session not found'})
-            }
+    # Store if session exists
+    if session:
+        append_to_session(session_id, 'music_generations', music_generation)
     
-        elif path.startswith('/api/generate_music/') and method == 'POST':
-        # Extract session ID from path
-        session_id = path.split('/')[-1]
-        
-        try:
-            body = json.loads(event.get('body', '{}'))
-        except:
-            body = {}
-        
-        # For testing, use default values if session not found
-        if session_id not in sessions:
-            theme = "Media Meltdown"
-            print(f"Session {session_id} not found, using default theme: {theme}")
-        else:
-            theme = sessions[session_id]['theme']
-        
-        prompt = body.get('prompt') or get_music_prompt_for_theme(theme)
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _dumps({
+            'status': 'success',
+            'music': music_generation
+        })
+    }
+
+def _gen_ideas(event, session_id, now):
+    """POST /api/generate_ideas/{session_id} - generate mix ideas with GROK"""
+    # For testing, use default values if session not found
+    session = get_session(session_id)
+    if not session:
+        episode_number = 1779
+        theme = "Media Meltdown"
+        print(f"Session {session_id} not found, using defaults: Episode {episode_number}, Theme: {theme}")
+    else:
+        episode_number = session['episode_number']
+        theme = session['theme']
+    
+    # Generate real ideas with GROK
+    try:
+        print(f"Starting GROK idea generation for Episode {episode_number}, Theme: {theme}")
+        ideas_generation = generate_ideas_with_grok(episode_number, theme, now)
+        print(f"GROK idea generation completed successfully")
+    except Exception as e:
+        logger.exception("GROK idea generation error")
         
-        # Generate real music with FAL.ai
+        # Return error instead of mock
+        return {
+            'statusCode': 500,
+            'headers': _JSON_HEADERS,
+            'body': _dumps({
+                'error': f'Ideas generation failed: {str(e)}',
+                'episode': episode_number,
+                'theme': theme
+            })
+        }
+    
+    # Store if session exists
+    if session:
+        append_to_session(session_id, 'ideas', ideas_generation)
+    
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _dumps({
+            'status': 'success',
+            'ideas': ideas_generation
+        })
+    }
+
+def _gen_all(event, session_id, now):
+    """POST /api/generate_all/{session_id} - generate ideas and music concurrently"""
+    body = _parse_body(event)
+    
+    # For testing, use default values if session not found
+    session = get_session(session_id)
+    if not session:
+        episode_number = 1779
+        theme = "Media Meltdown"
+        print(f"Session {session_id} not found, using defaults: Episode {episode_number}, Theme: {theme}")
+    else:
+        episode_number = session['episode_number']
+        theme = session['theme']
+    
+    prompt = body.get('prompt') or get_music_prompt_for_theme(theme)
+    
+    # Both calls are network-bound, so run them side by side: total time is
+    # the slower of the two rather than their sum
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        ideas_future = executor.submit(generate_ideas_with_grok, episode_number, theme, now)
+        music_future = executor.submit(generate_music_with_fal, prompt, now)
+    
+    results = {}
+    errors = {}
+    for name, future, field in (('ideas', ideas_future, 'ideas'),
+                                ('music', music_future, 'music_generations')):
         try:
-            music_generation = generate_music_with_fal(prompt)
+            results[name] = future.result()
         except Exception as e:
-            # Return error instead of mock
-            return {
-                'statusCode': 500,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'error': f'Music generation failed: {str(e)}',
-                    'prompt': prompt
-                })
-            }
+            errors[name] = str(e)
+            continue
         
         # Store if session exists
-        if session_id in sessions:
-            sessions[session_id]['music_generations'].append(music_generation)
-        
+        if session:
+            append_to_session(session_id, field, results[name])
+    
+    if not results:
         return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'status': 'success',
-                'music': music_generation
+            'statusCode': 500,
+            'headers': _JSON_HEADERS,
+            'body': _dumps({
+                'error': 'Ideas and music generation failed',
+                'errors': errors,
+                'episode': episode_number,
+                'theme': theme,
+                'prompt': prompt
             })
         }
     
-        elif path.startswith('/api/generate_ideas/') and method == 'POST':
-        # Extract session ID from path
-        session_id = path.split('/')[-1]
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _dumps({
+            'status': 'partial' if errors else 'success',
+            'ideas': results.get('ideas'),
+            'music': results.get('music'),
+            'errors': errors
+        })
+    }
+
+# Exact-match routes: (method, path) -> handler(event, now)
+_ROUTES = {
+    ('GET', '/'): _root,
+    ('GET', '/health'): _health,
+    ('POST', '/api/start_session'): _start_session
+}
+
+# Session-scoped routes: (method, route kind) -> handler(event, session_id, now)
+_SESSION_ROUTES = {
+    ('GET', 'session'): _get_session,
+    ('POST', 'generate_music'): _gen_music,
+    ('POST', 'generate_ideas'): _gen_ideas,
+    ('POST', 'generate_all'): _gen_all
+}
+
+# Matches /api/<kind>/<uuid>; malformed session ids fall through to the 404
+_PATH_RE = re.compile(r'^/api/(session|generate_music|generate_ideas|generate_all)/([0-9a-f-]{36})$')
+
+def lambda_handler(event, context):
+    """Simple Lambda handler for testing"""
+    
+    try:
+        # Handle CORS preflight requests; they never need secrets
+        if event.get('httpMethod') == 'OPTIONS':
+            return _OPTIONS_RESPONSE
         
-        # For testing, use default values if session not found
-        if session_id not in sessions:
-            episode_number = 1779
-            theme = "Media Meltdown"
-            print(f"Session {session_id} not found, using defaults: Episode {episode_number}, Theme: {theme}")
-        else:
-            session = sessions[session_id]
-            episode_number = session['episode_number']
-            theme = session['theme']
+        # Load secrets from AWS Secrets Manager
+        load_secrets()
         
-        # Generate real ideas with GROK
-        try:
-            print(f"Starting GROK idea generation for Episode {episode_number}, Theme: {theme}")
-            ideas_generation = generate_ideas_with_grok(episode_number, theme)
-            print(f"GROK idea generation completed successfully")
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"GROK idea generation error: {str(e)}")
-            print(f"Full traceback: {error_details}")
-            
-            # Return error instead of mock
-            return {
-                'statusCode': 500,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'error': f'Ideas generation failed: {str(e)}',
-                    'episode': episode_number,
-                    'theme': theme,
-                    'traceback': error_details
-                })
-            }
+        # Log the event
+        print(f"Event: {json.dumps(event)}")
         
-        # Store if session exists
-        if session_id in sessions:
-            sessions[session_id]['ideas'].append(ideas_generation)
+        # One timestamp for everything created during this invocation
+        now = _utc_now()
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'status': 'success',
-                'ideas': ideas_generation
-            })
-        }
+        # Simple routing
+        path = event.get('path', '/')
+        method = event.get('httpMethod', 'GET')
+        
+        handler = _ROUTES.get((method, path))
+        if handler:
+            return handler(event, now)
+        
+        match = _PATH_RE.match(path)
+        if match:
+            kind, session_id = match.group(1), match.group(2)
+            handler = _SESSION_ROUTES.get((method, kind))
+            if handler:
+                return handler(event, session_id, now)
     
         # Default 404
         return {
             'statusCode': 404,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
+            'headers': _JSON_HEADERS,
+            'body': _dumps({
                 'error': 'Not found',
                 'path': path,
                 'method': method
             })
         }
     
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Lambda handler error: {str(e)}")
-        print(f"Full traceback: {error_details}")
+    except Exception:
+        logger.exception("Lambda handler error")
         
         return {
             'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'error': f'Internal server error: {str(e)}',
-                'traceback': error_details
+            'headers': _JSON_HEADERS,
+            'body': _dumps({
+                'error': 'Internal server error',
+                'request_id': getattr(context, 'aws_request_id', None)
             })
         }
\ No newline at end of file
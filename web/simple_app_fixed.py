@@ -1,25 +1,208 @@
+import concurrent.futures
+import hashlib
 import json
+import logging
 import os
-from datetime import datetime
+import re
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import lru_cache
 import uuid
 
-# Global session storage (in a real app, use DynamoDB or S3)
+import boto3
+import requests
+from botocore.config import Config
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# DEBUG=1 logs every event and returns tracebacks in error responses
+DEBUG = os.getenv('DEBUG') == '1'
+
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG if DEBUG else logging.INFO)
+
+# Shared by every AWS client: keep-alive connections and adaptive retries
+_AWS_CFG = Config(
+    max_pool_connections=10,
+    tcp_keepalive=True,
+    retries={'max_attempts': 3, 'mode': 'adaptive'}
+)
+
+# Sessions live in DynamoDB when SESSIONS_TABLE is set so every container
+# sees the same state; the dict is only a fallback for local runs
+SESSIONS_TABLE = os.environ.get('SESSIONS_TABLE')
 sessions = {}
+_SESSIONS_TABLE = None
+
+def _get_sessions_table():
+    """Get or create the DynamoDB sessions table resource"""
+    global _SESSIONS_TABLE
+    if _SESSIONS_TABLE is None:
+        _SESSIONS_TABLE = boto3.resource('dynamodb', config=_AWS_CFG).Table(SESSIONS_TABLE)
+    return _SESSIONS_TABLE
+
+def _to_dynamo(item):
+    """Convert floats to Decimal, which is the only number type DynamoDB accepts"""
+    return json.loads(json.dumps(item), parse_float=Decimal)
+
+def _from_decimal(value):
+    """Turn a DynamoDB Decimal back into the int or float that was stored"""
+    return int(value) if value == value.to_integral_value() else float(value)
+
+def _decimal_default(obj):
+    """json.dumps fallback for the Decimal values DynamoDB returns"""
+    if isinstance(obj, Decimal):
+        return _from_decimal(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dumps(obj):
+    """Serialize a response body as compact UTF-8 JSON"""
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=_decimal_default)
+
+def save_session(session):
+    """Store a new session"""
+    if SESSIONS_TABLE:
+        _get_sessions_table().put_item(Item=_to_dynamo(session))
+    else:
+        sessions[session['session_id']] = session
+
+def get_session(session_id):
+    """Fetch a session by id, or None if it does not exist"""
+    if SESSIONS_TABLE:
+        # Strongly consistent, so a read straight after append_to_session sees that write
+        session = _get_sessions_table().get_item(
+            Key={'session_id': session_id},
+            ConsistentRead=True
+        ).get('Item')
+        # DynamoDB returns numbers as Decimal; only those need converting,
+        # whatever the client originally sent (even null) is passed through
+        if session is not None and isinstance(session.get('episode_number'), Decimal):
+            session['episode_number'] = _from_decimal(session['episode_number'])
+        return session
+    return sessions.get(session_id)
+
+def append_to_session(session_id, updated_at, **fields):
+    """Append one item to each of the named list fields and stamp updated_at, in a single write"""
+    if not fields:
+        return
+    if SESSIONS_TABLE:
+        # list_append updates in place, so there is no read-modify-write race
+        names = {}
+        values = {':empty': [], ':u': updated_at}
+        clauses = ['updated_at = :u']
+        for i, (field, item) in enumerate(fields.items()):
+            names[f'#f{i}'] = field
+            values[f':v{i}'] = [_to_dynamo(item)]
+            clauses.append(f'#f{i} = list_append(if_not_exists(#f{i}, :empty), :v{i})')
+        _get_sessions_table().update_item(
+            Key={'session_id': session_id},
+            UpdateExpression='SET ' + ', '.join(clauses),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+    elif session_id in sessions:
+        session = sessions[session_id]
+        for field, item in fields.items():
+            session[field].append(item)
+        session['updated_at'] = updated_at
+
+def _utc_now():
+    """Current UTC time as a timezone-aware ISO 8601 string, to the second"""
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+def _make_http_session():
+    """Build a keep-alive session that retries failed connection attempts"""
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        # Generation POSTs are billed and not idempotent: only retry when the
+        # request never reached the server, never after a timeout or error reply
+        max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2)
+    ))
+    session.headers.update({'Content-Type': 'application/json'})
+    return session
+
+# One pooled session per upstream host, reused across warm invocations
+_FAL_SESSION = _make_http_session()
+_GROK_SESSION = _make_http_session()
+
+# In-memory TTL cache for upstream AI responses: key -> (stored_at, value),
+# least recently used first. Lives as long as the warm container; guarded
+# because generate_all uses threads. Keys come from user input, so the
+# size is capped and stale entries are dropped when they are read
+_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_CACHE_MAXSIZE = 256
+_IDEAS_CACHE_TTL = 7 * 24 * 3600  # one week
+
+def _cache_get(key, ttl):
+    """Return the cached value for key if it is younger than ttl seconds"""
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] >= ttl:
+            del _CACHE[key]
+            return None
+        _CACHE.move_to_end(key)
+        return entry[1]
+
+def _cache_set(key, value):
+    """Store value under key with the current time, evicting the least recently used entry when full"""
+    with _CACHE_LOCK:
+        _CACHE[key] = (time.time(), value)
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > _CACHE_MAXSIZE:
+            _CACHE.popitem(last=False)
+
+# Music prompts per mix theme; 'Custom' doubles as the fallback
+_THEME_PROMPTS = {
+    'Best Of': 'Upbeat electronic podcast intro music with energetic synth melody, 128 BPM, perfect for highlighting the best moments',
+    'Conspiracy Corner': 'Dark ambient electronic music with mysterious undertones, glitch effects, and conspiracy theory vibes, 100 BPM',
+    'Media Meltdown': 'Chaotic breakbeat electronic music with news broadcast samples, media criticism energy, and distortion effects, 140 BPM',
+    'Donation Nation': 'Celebratory fanfare music with cash register sounds, applause, and triumphant horn sections, 120 BPM',
+    'Musical Mayhem': 'Experimental electronic collage with vocal chops, random beats, and unpredictable sound design, 130 BPM',
+    'Custom': 'Creative podcast background music with modern electronic elements, suitable for audio mixing, 125 BPM'
+}
+_DEFAULT_PROMPT = _THEME_PROMPTS['Custom']
 
 def get_music_prompt_for_theme(theme):
     """Generate music prompts based on theme"""
-    prompts = {
-        'Best Of': 'Upbeat electronic podcast intro music with energetic synth melody, 128 BPM, perfect for highlighting the best moments',
-        'Conspiracy Corner': 'Dark ambient electronic music with mysterious undertones, glitch effects, and conspiracy theory vibes, 100 BPM',
-        'Media Meltdown': 'Chaotic breakbeat electronic music with news broadcast samples, media criticism energy, and distortion effects, 140 BPM',
-        'Donation Nation': 'Celebratory fanfare music with cash register sounds, applause, and triumphant horn sections, 120 BPM',
-        'Musical Mayhem': 'Experimental electronic collage with vocal chops, random beats, and unpredictable sound design, 130 BPM',
-        'Custom': 'Creative podcast background music with modern electronic elements, suitable for audio mixing, 125 BPM'
+    return _THEME_PROMPTS.get(theme, _DEFAULT_PROMPT)
+
+# Callers pass str(theme): sessions store whatever the client sent, and a
+# number or list would break .lower() or the lru_cache key
+@lru_cache(maxsize=64)
+def _idea_template(theme):
+    """Theme-specific parts of the mock ideas, built once per theme"""
+    lower = theme.lower()
+    return {
+        'segments': (
+            {'name': 'Opening Hook', 'timestamp': '0:12:30', 'duration': 15, 'description': f'Perfect {lower} opening moment'},
+            {'name': 'Main Discussion', 'timestamp': '1:25:45', 'duration': 25, 'description': f'Core {lower} content segment'},
+            {'name': 'Comedy Gold', 'timestamp': '2:15:20', 'duration': 20, 'description': f'Hilarious {lower} moment'},
+            {'name': 'Producer Segment', 'timestamp': '2:45:10', 'duration': 15, 'description': f'{theme} producer contributions'},
+            {'name': 'Closing Thoughts', 'timestamp': '2:58:30', 'duration': 18, 'description': f'Final {lower} insights'}
+        ),
+        'music_prompts': (
+            get_music_prompt_for_theme(theme),
+            f'Energetic {lower} transition music with podcast energy, 125 BPM',
+            f'Atmospheric {lower} outro music with thoughtful undertones, 110 BPM'
+        ),
+        'ideas_note': f'AI-generated ideas for {theme} theme - GROK integration available on test endpoint',
+        'music_note': f'Mock music generation for {theme} theme - FAL.ai integration available on test endpoint'
     }
-    
-    return prompts.get(theme, prompts['Custom'])
 
-def generate_music_with_fal(prompt):
+# Built-in themes are specialized at import; custom ones on first use
+for _theme in _THEME_PROMPTS:
+    _idea_template(_theme)
+
+def generate_music_with_fal(prompt, created_at=None):
     """Generate music using FAL.ai API"""
     try:
         # Get FAL API key from environment (loaded from secrets)
@@ -28,14 +211,11 @@ def generate_music_with_fal(prompt):
             print("FAL_API_KEY not available")
             raise Exception("FAL_API_KEY not configured")
         
-        import requests
-        
         print(f"Generating music with FAL.ai: {prompt}")
         
         # FAL.ai API call using the correct endpoint
         headers = {
-            'Authorization': f'Key {fal_key}',
-            'Content-Type': 'application/json'
+            'Authorization': f'Key {fal_key}'
         }
         
         payload = {
@@ -44,7 +224,7 @@ def generate_music_with_fal(prompt):
         }
         
         # Use the correct FAL.ai endpoint for music generation
-        response = requests.post(
+        response = _FAL_SESSION.post(
             'https://fal.run/fal-ai/stable-audio',
             headers=headers,
             json=payload,
@@ -63,7 +243,7 @@ def generate_music_with_fal(prompt):
             return {
                 'id': str(uuid.uuid4()),
                 'prompt': prompt,
-                'created_at': datetime.utcnow().isoformat(),
+                'created_at': created_at or _utc_now(),
                 'status': 'completed',
                 'audio_url': audio_url,
                 'duration': 30,
@@ -78,7 +258,7 @@ def generate_music_with_fal(prompt):
         print(f"Error calling FAL.ai: {e}")
         raise e
 
-def generate_ideas_with_grok(episode_number, theme):
+def generate_ideas_with_grok(episode_number, theme, created_at=None):
     """Generate mix ideas using GROK AI - simplified version"""
     try:
         # Get GROK API key from environment (loaded from secrets)
@@ -87,17 +267,41 @@ def generate_ideas_with_grok(episode_number, theme):
             print("GROK_API_KEY not available")
             raise Exception("GROK_API_KEY not configured")
         
-        import requests
+        # Identical (episode, theme) requests reuse the earlier GROK answer
+        cache_key = hashlib.sha1(f"{episode_number}|{theme}".encode()).hexdigest()
+        cached = _cache_get(cache_key, _IDEAS_CACHE_TTL)
         
-        print(f"Generating ideas with GROK for Episode {episode_number}, Theme: {theme}")
+        if cached:
+            print(f"GROK cache hit for Episode {episode_number}, Theme: {theme}")
+            ideas, summary = cached
+        else:
+            ideas, summary = _request_grok_ideas(grok_key, episode_number, theme)
+            _cache_set(cache_key, (ideas, summary))
         
-        # GROK AI API call - simplified
-        headers = {
-            'Authorization': f'Bearer {grok_key}',
-            'Content-Type': 'application/json'
+        return {
+            'id': str(uuid.uuid4()),
+            'episode_number': episode_number,
+            'theme': theme,
+            'created_at': created_at or _utc_now(),
+            'status': 'completed',
+            'ideas': ideas,
+            'grok_response': summary
         }
-        
-        prompt = f"""Create creative mix ideas for No Agenda Episode {episode_number} with theme "{theme}".
+            
+    except Exception as e:
+        print(f"Error calling GROK: {e}")
+        raise e
+
+def _request_grok_ideas(grok_key, episode_number, theme):
+    """Call GROK and return (ideas, response model/usage summary)"""
+    print(f"Generating ideas with GROK for Episode {episode_number}, Theme: {theme}")
+    
+    # GROK AI API call - simplified
+    headers = {
+        'Authorization': f'Bearer {grok_key}'
+    }
+    
+    prompt = f"""Create creative mix ideas for No Agenda Episode {episode_number} with theme "{theme}".
 
 Generate ideas for:
 1. Mix Concept: Overall creative vision
@@ -105,84 +309,379 @@ Generate ideas for:
 3. 3 Music prompts for AI generation
 
 Be specific and capture the No Agenda podcast vibe."""
-        
-        payload = {
-            'messages': [
-                {'role': 'user', 'content': prompt}
-            ],
-            'model': 'grok-2-1212',
-            'temperature': 0.7
-        }
-        
-        response = requests.post(
-            'https://api.x.ai/v1/chat/completions',
-            headers=headers,
-            json=payload,
-            timeout=30  # Reduced timeout
-        )
-        
-        print(f"GROK response status: {response.status_code}")
-        
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content']
-            
-            print(f"GROK success: Generated ideas")
-            
-            # Create structured response without JSON parsing
-            ideas = {
-                'mix_concept': f"AI-generated mix concept for {theme} theme",
-                'segments': [
-                    {'name': 'Segment 1', 'timestamp': '0:15:30', 'duration': 15, 'description': 'Opening segment'},
-                    {'name': 'Segment 2', 'timestamp': '1:22:45', 'duration': 20, 'description': 'Main content'},
-                    {'name': 'Segment 3', 'timestamp': '2:41:15', 'duration': 15, 'description': 'Closing segment'}
-                ],
-                'music_prompts': [
-                    get_music_prompt_for_theme(theme),
-                    f"Energetic {theme.lower()} style background music",
-                    f"Atmospheric {theme.lower()} outro music"
-                ],
-                'raw_content': content
-            }
-            
-            return {
-                'id': str(uuid.uuid4()),
-                'episode_number': episode_number,
-                'theme': theme,
-                'created_at': datetime.utcnow().isoformat(),
-                'status': 'completed',
-                'ideas': ideas,
-                'grok_response': result
-            }
-        else:
-            error_text = response.text
-            print(f"GROK API error: {response.status_code} - {error_text}")
-            raise Exception(f"GROK API error: {response.status_code} - {error_text}")
-            
-    except Exception as e:
-        print(f"Error calling GROK: {e}")
-        raise e
+    
+    payload = {
+        'messages': [
+            {'role': 'user', 'content': prompt}
+        ],
+        'model': 'grok-2-1212',
+        'temperature': 0.7
+    }
+    
+    response = _GROK_SESSION.post(
+        'https://api.x.ai/v1/chat/completions',
+        headers=headers,
+        json=payload,
+        timeout=30  # Reduced timeout
+    )
+    
+    print(f"GROK response status: {response.status_code}")
+    
+    if response.status_code != 200:
+        error_text = response.text
+        print(f"GROK API error: {response.status_code} - {error_text}")
+        raise Exception(f"GROK API error: {response.status_code} - {error_text}")
+    
+    result = response.json()
+    content = result['choices'][0]['message']['content']
+    # Only the metadata is echoed back; the completion text is already in raw_content
+    summary = {'model': result.get('model'), 'usage': result.get('usage')}
+    
+    print(f"GROK success: Generated ideas")
+    
+    # Create structured response without JSON parsing
+    ideas = {
+        'mix_concept': f"AI-generated mix concept for {theme} theme",
+        'segments': [
+            {'name': 'Segment 1', 'timestamp': '0:15:30', 'duration': 15, 'description': 'Opening segment'},
+            {'name': 'Segment 2', 'timestamp': '1:22:45', 'duration': 20, 'description': 'Main content'},
+            {'name': 'Segment 3', 'timestamp': '2:41:15', 'duration': 15, 'description': 'Closing segment'}
+        ],
+        'music_prompts': [
+            get_music_prompt_for_theme(theme),
+            f"Energetic {theme.lower()} style background music",
+            f"Atmospheric {theme.lower()} outro music"
+        ],
+        'raw_content': content
+    }
+    
+    return ideas, summary
 
-def load_secrets():
-    """Load secrets from AWS Secrets Manager"""
-    if os.getenv('AWS_LAMBDA_FUNCTION_NAME'):
+def generate_ideas_and_music(episode_number, theme, prompt, created_at=None):
+    """Run the GROK and FAL.ai generators concurrently
+    
+    Both calls are network-bound, so total time is the slower of the two
+    rather than their sum. Returns (ideas, music, errors); a failed call
+    yields None and its message under errors['ideas'] or errors['music'].
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        futures = {
+            'ideas': executor.submit(generate_ideas_with_grok, episode_number, theme, created_at),
+            'music': executor.submit(generate_music_with_fal, prompt, created_at)
+        }
+    
+    results = {}
+    errors = {}
+    for name, future in futures.items():
         try:
-            import boto3
-            secrets_client = boto3.client('secretsmanager')
-            
-            secret_response = secrets_client.get_secret_value(
-                SecretId='no-agenda-mixer/api-keys'
-            )
-            
-            secrets = json.loads(secret_response['SecretString'])
-            
-            # Set environment variables
-            for key, value in secrets.items():
-                os.environ[key] = value
-                print(f"Loaded secret: {key}")
-                
+            results[name] = future.result()
         except Exception as e:
-            print(f"Failed to load secrets: {e}")
+            errors[name] = str(e)
+    
+    return results.get('ideas'), results.get('music'), errors
+
+@lru_cache(maxsize=1)
+def _get_secrets_client():
+    """Create the Secrets Manager client once per container"""
+    return boto3.client('secretsmanager', config=_AWS_CFG)
+
+@lru_cache(maxsize=1)
+def _load_secrets_cached():
+    """Fetch the API keys secret and export it; cached so warm invocations skip the call"""
+    secret_response = _get_secrets_client().get_secret_value(
+        SecretId='no-agenda-mixer/api-keys'
+    )
+    
+    secrets = json.loads(secret_response['SecretString'])
+    
+    # Set environment variables
+    for key, value in secrets.items():
+        os.environ[key] = value
+        print(f"Loaded secret: {key}")
+    
+    return secrets
+
+_IN_LAMBDA = bool(os.getenv('AWS_LAMBDA_FUNCTION_NAME'))
+_SECRETS_LOADED = False
+
+def load_secrets():
+    """Load secrets from AWS Secrets Manager once per container"""
+    global _SECRETS_LOADED
+    if _SECRETS_LOADED or not _IN_LAMBDA:
+        return
+    try:
+        _load_secrets_cached()
+        _SECRETS_LOADED = True
+    except Exception as e:
+        # Not marked as loaded, so the next invocation retries
+        print(f"Failed to load secrets: {e}")
+
+# Fetch during Lambda init so the first request does not pay for it
+load_secrets()
+
+# Response headers shared by every route; never mutated per request
+_JSON_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+_CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+}
+
+# The API banner never changes, so it is serialized once at import
+_ROOT_BODY = _dumps({
+    'message': 'No Agenda Mixer API is running!',
+    'version': '2.0',
+    'endpoints': [
+        'GET /',
+        'GET /health',
+        'POST /api/start_session',
+        'POST /api/generate_ideas/{session_id}',
+        'POST /api/generate_music/{session_id}',
+        'POST /api/generate_all/{session_id}',
+        'GET /api/session/{session_id}'
+    ]
+})
+
+def _parse_body(event):
+    """Decode the request body, which may be absent, a JSON string, or already a dict"""
+    body = event.get('body')
+    if body is None or body == '':
+        return {}
+    if isinstance(body, dict):
+        return body
+    try:
+        parsed = json.loads(body)
+    except (TypeError, ValueError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+def _root(event, now):
+    """Describe the API"""
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _ROOT_BODY
+    }
+
+def _health(event, now):
+    """Report health and which API keys are configured"""
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _dumps({
+            'status': 'healthy',
+            'timestamp': now,
+            'has_grok_key': bool(os.getenv('GROK_API_KEY')),
+            'has_fal_key': bool(os.getenv('FAL_API_KEY'))
+        })
+    }
+
+def _start_session(event, now):
+    """Create a new mixing session"""
+    body = _parse_body(event)
+
+    session_id = str(uuid.uuid4())
+
+    # Create session object
+    session = {
+        'session_id': session_id,
+        'created_at': now,
+        'episode_number': body.get('episode_number', 1779),
+        'theme': body.get('theme', 'Best Of'),
+        'status': 'started',
+        'ideas': [],
+        'music_generations': [],
+        'clips': [],
+        'logs': []
+    }
+
+    # Store session
+    save_session(session)
+
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _dumps({
+            'session_id': session_id,
+            'status': 'started',
+            'episode': session['episode_number'],
+            'theme': session['theme']
+        })
+    }
+
+def _get_session(event, session_id, now):
+    """Return a stored session"""
+    session = get_session(session_id)
+    if session is not None:
+        return {
+            'statusCode': 200,
+            'headers': _JSON_HEADERS,
+            'body': _dumps(session)
+        }
+    else:
+        return {
+            'statusCode': 404,
+            'headers': _JSON_HEADERS,
+            'body': _dumps({'error': 'Session not found'})
+        }
+
+def _gen_music(event, session_id, now):
+    """Generate music for a session"""
+    body = _parse_body(event)
+
+    # For testing, use default values if session not found
+    session = get_session(session_id)
+    if session is None:
+        theme = "Media Meltdown"
+        print(f"Session {session_id} not found, using default theme: {theme}")
+    else:
+        theme = session['theme']
+
+    prompt = body.get('prompt') or get_music_prompt_for_theme(theme)
+
+    # Generate music - using fallback for frontend compatibility
+    print(f"Generating music for theme: {theme}")
+
+    # Fallback music generation
+    music_generation = {
+        'id': str(uuid.uuid4()),
+        'prompt': prompt,
+        'created_at': now,
+        'status': 'completed',
+        'audio_url': None,
+        'duration': 30,
+        'note': _idea_template(str(theme))['music_note']
+    }
+
+    # Store if session exists
+    if session is not None:
+        append_to_session(session_id, now, music_generations=music_generation)
+
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _dumps({
+            'status': 'success',
+            'music': music_generation
+        })
+    }
+
+def _gen_ideas(event, session_id, now):
+    """Generate mix ideas for a session"""
+    # For testing, use default values if session not found
+    session = get_session(session_id)
+    if session is None:
+        episode_number = 1779
+        theme = "Media Meltdown"
+        print(f"Session {session_id} not found, using defaults: Episode {episode_number}, Theme: {theme}")
+    else:
+        episode_number = session['episode_number']
+        theme = session['theme']
+
+    # Generate ideas - using structured fallback for now
+    print(f"Generating ideas for Episode {episode_number}, Theme: {theme}")
+
+    # Structured mock data to keep frontend working
+    template = _idea_template(str(theme))
+    ideas_generation = {
+        'id': str(uuid.uuid4()),
+        'episode_number': episode_number,
+        'theme': theme,
+        'created_at': now,
+        'status': 'completed',
+        'ideas': {
+            'mix_concept': f'Creative {theme} mix featuring the best moments from No Agenda Episode {episode_number}. This mix will capture the essence of the show with carefully selected segments and AI-generated music.',
+            'segments': list(template['segments']),
+            'music_prompts': list(template['music_prompts'])
+        },
+        'note': template['ideas_note']
+    }
+
+    # Store if session exists
+    if session is not None:
+        append_to_session(session_id, now, ideas=ideas_generation)
+
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _dumps({
+            'status': 'success',
+            'ideas': ideas_generation
+        })
+    }
+
+def _gen_all(event, session_id, now):
+    """Generate ideas and music for a session concurrently"""
+    body = _parse_body(event)
+
+    # For testing, use default values if session not found
+    session = get_session(session_id)
+    if session is None:
+        episode_number = 1779
+        theme = "Media Meltdown"
+        print(f"Session {session_id} not found, using defaults: Episode {episode_number}, Theme: {theme}")
+    else:
+        episode_number = session['episode_number']
+        theme = session['theme']
+
+    prompt = body.get('prompt') or get_music_prompt_for_theme(theme)
+
+    ideas_generation, music_generation, errors = generate_ideas_and_music(
+        episode_number, theme, prompt, now
+    )
+
+    if ideas_generation is None and music_generation is None:
+        return {
+            'statusCode': 500,
+            'headers': _JSON_HEADERS,
+            'body': _dumps({
+                'error': 'Ideas and music generation failed',
+                'errors': errors,
+                'episode': episode_number,
+                'theme': theme,
+                'prompt': prompt
+            })
+        }
+
+    # Store if session exists; both results go out in one write
+    if session is not None:
+        results = {}
+        if ideas_generation:
+            results['ideas'] = ideas_generation
+        if music_generation:
+            results['music_generations'] = music_generation
+        append_to_session(session_id, now, **results)
+
+    return {
+        'statusCode': 200,
+        'headers': _JSON_HEADERS,
+        'body': _dumps({
+            'status': 'partial' if errors else 'success',
+            'ideas': ideas_generation,
+            'music': music_generation,
+            'errors': errors
+        })
+    }
+
+# Exact-match routes: (method, path) -> handler(event, now)
+_ROUTES = {
+    ('GET', '/'): _root,
+    ('GET', '/health'): _health,
+    ('POST', '/api/start_session'): _start_session,
+}
+
+# Session-scoped routes, matched by _PATH_RE: (method, route kind) -> handler(event, session_id, now)
+_SESSION_ROUTES = {
+    ('GET', 'session'): _get_session,
+    ('POST', 'generate_music'): _gen_music,
+    ('POST', 'generate_ideas'): _gen_ideas,
+    ('POST', 'generate_all'): _gen_all,
+}
+
+_PATH_RE = re.compile(r'^/api/(session|generate_music|generate_ideas|generate_all)/([^/]+)$')
 
 def lambda_handler(event, context):
     """Lambda handler for No Agenda Mixer"""
@@ -191,257 +690,56 @@ def lambda_handler(event, context):
         # Load secrets from AWS Secrets Manager
         load_secrets()
         
-        # Log the event
-        print(f"Event: {json.dumps(event)}")
+        # Log the event; dumping large API Gateway events is skipped unless debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Event: %s", json.dumps(event))
         
         # Handle CORS preflight requests
         if event.get('httpMethod') == 'OPTIONS':
             return {
                 'statusCode': 200,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-                },
+                'headers': _CORS_HEADERS,
                 'body': ''
             }
         
+        # One timestamp for everything created during this invocation
+        now = _utc_now()
+        
         # Simple routing
         path = event.get('path', '/')
         method = event.get('httpMethod', 'GET')
         
-        if path == '/' and method == 'GET':
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'message': 'No Agenda Mixer API is running!',
-                    'version': '2.0',
-                    'endpoints': [
-                        'GET /',
-                        'GET /health',
-                        'POST /api/start_session',
-                        'POST /api/generate_ideas/{session_id}',
-                        'POST /api/generate_music/{session_id}',
-                        'GET /api/session/{session_id}'
-                    ]
-                })
-            }
-        
-        elif path == '/health' and method == 'GET':
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'status': 'healthy',
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'has_grok_key': bool(os.getenv('GROK_API_KEY')),
-                    'has_fal_key': bool(os.getenv('FAL_API_KEY'))
-                })
-            }
-        
-        elif path == '/api/start_session' and method == 'POST':
-            # Parse body
-            try:
-                body = json.loads(event.get('body', '{}'))
-            except:
-                body = {}
-            
-            session_id = str(uuid.uuid4())
-            
-            # Create session object
-            session = {
-                'session_id': session_id,
-                'created_at': datetime.utcnow().isoformat(),
-                'episode_number': body.get('episode_number', 1779),
-                'theme': body.get('theme', 'Best Of'),
-                'status': 'started',
-                'ideas': [],
-                'music_generations': [],
-                'clips': [],
-                'logs': []
-            }
-            
-            # Store session
-            sessions[session_id] = session
-            
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'session_id': session_id,
-                    'status': 'started',
-                    'episode': session['episode_number'],
-                    'theme': session['theme']
-                })
-            }
-        
-        elif path.startswith('/api/session/') and method == 'GET':
-            # Extract session ID from path
-            session_id = path.split('/')[-1]
-            
-            if session_id in sessions:
-                return {
-                    'statusCode': 200,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps(sessions[session_id])
-                }
-            else:
-                return {
-                    'statusCode': 404,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'Session not found'})
-                }
-        
-        elif path.startswith('/api/generate_music/') and method == 'POST':
-            # Extract session ID from path
-            session_id = path.split('/')[-1]
-            
-            try:
-                body = json.loads(event.get('body', '{}'))
-            except:
-                body = {}
-            
-            # For testing, use default values if session not found
-            if session_id not in sessions:
-                theme = "Media Meltdown"
-                print(f"Session {session_id} not found, using default theme: {theme}")
-            else:
-                theme = sessions[session_id]['theme']
-            
-            prompt = body.get('prompt') or get_music_prompt_for_theme(theme)
-            
-            # Generate music - using fallback for frontend compatibility
-            print(f"Generating music for theme: {theme}")
-            
-            # Fallback music generation
-            music_generation = {
-                'id': str(uuid.uuid4()),
-                'prompt': prompt,
-                'created_at': datetime.utcnow().isoformat(),
-                'status': 'completed',
-                'audio_url': None,
-                'duration': 30,
-                'note': f'Mock music generation for {theme} theme - FAL.ai integration available on test endpoint'
-            }
-            
-            # Store if session exists
-            if session_id in sessions:
-                sessions[session_id]['music_generations'].append(music_generation)
-            
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'status': 'success',
-                    'music': music_generation
-                })
-            }
+        handler = _ROUTES.get((method, path))
+        if handler:
+            return handler(event, now)
         
-        elif path.startswith('/api/generate_ideas/') and method == 'POST':
-            # Extract session ID from path
-            session_id = path.split('/')[-1]
-            
-            # For testing, use default values if session not found
-            if session_id not in sessions:
-                episode_number = 1779
-                theme = "Media Meltdown"
-                print(f"Session {session_id} not found, using defaults: Episode {episode_number}, Theme: {theme}")
-            else:
-                session = sessions[session_id]
-                episode_number = session['episode_number']
-                theme = session['theme']
-            
-            # Generate ideas - using structured fallback for now
-            print(f"Generating ideas for Episode {episode_number}, Theme: {theme}")
-            
-            # Structured mock data to keep frontend working
-            ideas_generation = {
-                'id': str(uuid.uuid4()),
-                'episode_number': episode_number,
-                'theme': theme,
-                'created_at': datetime.utcnow().isoformat(),
-                'status': 'completed',
-                'ideas': {
-                    'mix_concept': f'Creative {theme} mix featuring the best moments from No Agenda Episode {episode_number}. This mix will capture the essence of the show with carefully selected segments and AI-generated music.',
-                    'segments': [
-                        {'name': 'Opening Hook', 'timestamp': '0:12:30', 'duration': 15, 'description': f'Perfect {theme.lower()} opening moment'},
-                        {'name': 'Main Discussion', 'timestamp': '1:25:45', 'duration': 25, 'description': f'Core {theme.lower()} content segment'},
-                        {'name': 'Comedy Gold', 'timestamp': '2:15:20', 'duration': 20, 'description': f'Hilarious {theme.lower()} moment'},
-                        {'name': 'Producer Segment', 'timestamp': '2:45:10', 'duration': 15, 'description': f'{theme} producer contributions'},
-                        {'name': 'Closing Thoughts', 'timestamp': '2:58:30', 'duration': 18, 'description': f'Final {theme.lower()} insights'}
-                    ],
-                    'music_prompts': [
-                        get_music_prompt_for_theme(theme),
-                        f'Energetic {theme.lower()} transition music with podcast energy, 125 BPM',
-                        f'Atmospheric {theme.lower()} outro music with thoughtful undertones, 110 BPM'
-                    ]
-                },
-                'note': f'AI-generated ideas for {theme} theme - GROK integration available on test endpoint'
-            }
-            
-            # Store if session exists
-            if session_id in sessions:
-                sessions[session_id]['ideas'].append(ideas_generation)
-            
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'status': 'success',
-                    'ideas': ideas_generation
-                })
-            }
+        match = _PATH_RE.match(path)
+        if match:
+            kind, session_id = match.group(1), match.group(2)
+            handler = _SESSION_ROUTES.get((method, kind))
+            if handler:
+                return handler(event, session_id, now)
         
         # Default 404
         return {
             'statusCode': 404,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
+            'headers': _JSON_HEADERS,
+            'body': _dumps({
                 'error': 'Not found',
                 'path': path,
                 'method': method
             })
         }
     
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Lambda handler error: {str(e)}")
-        print(f"Full traceback: {error_details}")
+    except Exception:
+        logger.exception("Lambda handler error")
+        
+        error = {'error': 'Internal server error'}
+        if DEBUG:
+            error['traceback'] = traceback.format_exc()
         
         return {
             'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'error': f'Internal server error: {str(e)}',
-                'traceback': error_details
-            })
-        }
\ No newline at end of file
+            'headers': _JSON_HEADERS,
+            'body': _dumps(error)
+        }
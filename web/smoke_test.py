@@ -4,39 +4,36 @@ Comprehensive Smoke Test for No Agenda Professional Mixer
 Tests all endpoints and functionality
 """
 
-import requests
 import json
-import time
 import sys
-from datetime import datetime
+from functools import cached_property
 
-class NoAgendaMixerSmokeTest:
+from smoke_test_base import BaseSmokeTest
+
+# Request bodies never change between runs, so they are serialized once
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+_EMPTY_JSON = b'{}'
+_SESSION_PAYLOAD = json.dumps({
+    "episode_number": 1779,
+    "theme": "Best Of"
+}).encode()
+
+class NoAgendaMixerSmokeTest(BaseSmokeTest):
+    START_BANNER = "🧪 Starting No Agenda Professional Mixer Smoke Tests"
+    RESULTS_BANNER = "🎯 SMOKE TEST RESULTS"
+    PASS_MESSAGE = "🎉 ALL SMOKE TESTS PASSED! System is ready for production."
+    FAIL_MESSAGE = "⚠️  {failed} tests failed. System needs attention before production."
+    REPORT_FILENAME = 'smoke_test_report.json'
+    REPORT_LABEL = "Detailed report"
+    
     def __init__(self, base_url="https://4as1uxx25a.execute-api.us-east-1.amazonaws.com/dev"):
-        self.base_url = base_url
-        self.test_results = []
+        super().__init__(base_url)
         self.session_id = None
     
-    def log_test(self, test_name, status, message, details=None):
-        """Log test result"""
-        result = {
-            'test': test_name,
-            'status': status,
-            'message': message,
-            'timestamp': datetime.now().isoformat(),
-            'details': details
-        }
-        self.test_results.append(result)
-        
-        icon = "✅" if status == "PASS" else "❌" if status == "FAIL" else "⚠️"
-        print(f"{icon} {test_name}: {message}")
-        
-        if details:
-            print(f"   Details: {details}")
-    
     def test_health_endpoint(self):
         """Test system health"""
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=10)
+            response = self.http.get(f"{self.base_url}/health", timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -62,15 +59,10 @@ class NoAgendaMixerSmokeTest:
     def test_session_creation(self):
         """Test session creation"""
         try:
-            payload = {
-                "episode_number": 1779,
-                "theme": "Best Of"
-            }
-            
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/api/start_session",
-                headers={'Content-Type': 'application/json'},
-                json=payload,
+                headers=_JSON_HEADERS,
+                data=_SESSION_PAYLOAD,
                 timeout=15
             )
             
@@ -98,15 +90,11 @@ class NoAgendaMixerSmokeTest:
     
     def test_ideas_generation(self):
         """Test AI ideas generation"""
-        if not self.session_id:
-            self.log_test("Ideas Generation", "SKIP", "No session ID available")
-            return False
-        
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/api/generate_ideas/{self.session_id}",
-                headers={'Content-Type': 'application/json'},
-                json={},
+                headers=_JSON_HEADERS,
+                data=_EMPTY_JSON,
                 timeout=30
             )
             
@@ -135,15 +123,11 @@ class NoAgendaMixerSmokeTest:
     
     def test_music_generation(self):
         """Test music generation"""
-        if not self.session_id:
-            self.log_test("Music Generation", "SKIP", "No session ID available")
-            return False
-        
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/api/generate_music/{self.session_id}",
-                headers={'Content-Type': 'application/json'},
-                json={},
+                headers=_JSON_HEADERS,
+                data=_EMPTY_JSON,
                 timeout=30
             )
             
@@ -171,12 +155,8 @@ class NoAgendaMixerSmokeTest:
     
     def test_session_retrieval(self):
         """Test session data retrieval"""
-        if not self.session_id:
-            self.log_test("Session Retrieval", "SKIP", "No session ID available")
-            return False
-        
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/api/session/{self.session_id}",
                 timeout=15
             )
@@ -206,44 +186,13 @@ class NoAgendaMixerSmokeTest:
     
     def test_cors_compliance(self):
         """Test CORS headers"""
-        try:
-            response = requests.options(f"{self.base_url}/health", timeout=10)
-            
-            cors_headers = [
-                'Access-Control-Allow-Origin',
-                'Access-Control-Allow-Methods',
-                'Access-Control-Allow-Headers'
-            ]
-            
-            missing_headers = []
-            for header in cors_headers:
-                if header not in response.headers:
-                    missing_headers.append(header)
-            
-            if not missing_headers:
-                self.log_test(
-                    "CORS Compliance", 
-                    "PASS", 
-                    "All CORS headers present"
-                )
-                return True
-            else:
-                self.log_test(
-                    "CORS Compliance", 
-                    "FAIL", 
-                    f"Missing headers: {missing_headers}"
-                )
-                return False
-                
-        except Exception as e:
-            self.log_test("CORS Compliance", "FAIL", f"Request failed: {str(e)}")
-            return False
+        return self._check_cors("CORS Compliance", "/health")
     
     def test_error_handling(self):
         """Test error handling"""
         try:
             # Test invalid endpoint
-            response = requests.get(f"{self.base_url}/invalid/endpoint", timeout=10)
+            response = self.http.get(f"{self.base_url}/invalid/endpoint", timeout=10)
             
             if response.status_code == 404:
                 try:
@@ -267,102 +216,26 @@ class NoAgendaMixerSmokeTest:
     
     def test_performance(self):
         """Test basic performance"""
-        try:
-            start_time = time.time()
-            response = requests.get(f"{self.base_url}/health", timeout=10)
-            end_time = time.time()
-            
-            response_time = (end_time - start_time) * 1000  # ms
-            
-            if response.status_code == 200 and response_time < 2000:  # Under 2 seconds
-                self.log_test(
-                    "Performance", 
-                    "PASS", 
-                    f"Response time acceptable",
-                    f"{response_time:.0f}ms"
-                )
-                return True
-            else:
-                self.log_test(
-                    "Performance", 
-                    "WARN", 
-                    f"Slow response",
-                    f"{response_time:.0f}ms"
-                )
-                return False
-                
-        except Exception as e:
-            self.log_test("Performance", "FAIL", f"Request failed: {str(e)}")
-            return False
-    
-    def run_all_tests(self):
-        """Run comprehensive smoke tests"""
-        print("🧪 Starting No Agenda Professional Mixer Smoke Tests")
-        print("=" * 60)
-        
-        tests = [
-            self.test_health_endpoint,
-            self.test_cors_compliance,
-            self.test_performance,
-            self.test_session_creation,
-            self.test_ideas_generation,
-            self.test_music_generation,
-            self.test_session_retrieval,
-            self.test_error_handling
-        ]
-        
-        passed = 0
-        failed = 0
-        warnings = 0
-        
-        for test in tests:
-            try:
-                result = test()
-                if result:
-                    passed += 1
-                else:
-                    failed += 1
-            except Exception as e:
-                self.log_test(test.__name__, "FAIL", f"Test execution failed: {str(e)}")
-                failed += 1
-            
-            time.sleep(1)  # Brief pause between tests
-        
-        # Count warnings
-        warnings = sum(1 for r in self.test_results if r['status'] == 'WARN')
-        
-        print("\n" + "=" * 60)
-        print("🎯 SMOKE TEST RESULTS")
-        print("=" * 60)
-        print(f"✅ Passed: {passed}")
-        print(f"❌ Failed: {failed}")
-        print(f"⚠️  Warnings: {warnings}")
-        print(f"📊 Total: {len(self.test_results)}")
-        
-        if failed == 0:
-            print("\n🎉 ALL SMOKE TESTS PASSED! System is ready for production.")
-            return True
-        else:
-            print(f"\n⚠️  {failed} tests failed. System needs attention before production.")
-            return False
+        return self._check_performance("Performance", "/health", 2000)  # Under 2 seconds
     
-    def generate_report(self):
-        """Generate detailed test report"""
-        report = {
-            'timestamp': datetime.now().isoformat(),
-            'base_url': self.base_url,
-            'total_tests': len(self.test_results),
-            'passed': sum(1 for r in self.test_results if r['status'] == 'PASS'),
-            'failed': sum(1 for r in self.test_results if r['status'] == 'FAIL'),
-            'warnings': sum(1 for r in self.test_results if r['status'] == 'WARN'),
-            'tests': self.test_results
-        }
-        
-        with open('smoke_test_report.json', 'w') as f:
-            json.dump(report, f, indent=2)
+    @cached_property
+    def tests(self):
+        """(name, test, names it depends on), listed in dependency order
         
-        print(f"\n📋 Detailed report saved to: smoke_test_report.json")
-        return report
+        Built once per instance, so repeated runs reuse the bound methods.
+        Music waits for ideas: a deployment that keeps sessions in memory can
+        route two concurrent appends to different containers and lose one.
+        """
+        return (
+            ("Health Check", self.test_health_endpoint, ()),
+            ("CORS Compliance", self.test_cors_compliance, ()),
+            ("Performance", self.test_performance, ()),
+            ("Error Handling", self.test_error_handling, ()),
+            ("Session Creation", self.test_session_creation, ("Health Check",)),
+            ("Ideas Generation", self.test_ideas_generation, ("Session Creation",)),
+            ("Music Generation", self.test_music_generation, ("Ideas Generation",)),
+            ("Session Retrieval", self.test_session_retrieval, ("Music Generation",))
+        )
 
 def main():
     """Main function"""
@@ -372,9 +245,9 @@ def main():
     print(f"🌐 Base URL: {base_url}")
     print()
     
-    tester = NoAgendaMixerSmokeTest(base_url)
-    success = tester.run_all_tests()
-    tester.generate_report()
+    with NoAgendaMixerSmokeTest(base_url) as tester:
+        success = tester.run_all_tests()
+        tester.generate_report()
     
     sys.exit(0 if success else 1)
 
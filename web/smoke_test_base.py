@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Shared machinery for the No Agenda Mixer smoke tests
+Subclasses list their checks in `tests` and set the banner/report attributes
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import json
+import os
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+_ICONS = {"PASS": "✅", "FAIL": "❌", "WARN": "⚠️", "SKIP": "⏭️"}
+
+_CORS_HEADERS = (
+    'Access-Control-Allow-Origin',
+    'Access-Control-Allow-Methods',
+    'Access-Control-Allow-Headers'
+)
+
+class BaseSmokeTest(ABC):
+    START_BANNER = "🧪 Starting Smoke Tests"
+    RESULTS_BANNER = "🎯 SMOKE TEST RESULTS"
+    PASS_MESSAGE = "🎉 ALL SMOKE TESTS PASSED!"
+    FAIL_MESSAGE = "⚠️  {failed} tests failed."
+    REPORT_FILENAME = 'smoke_test_report.json'
+    REPORT_LABEL = "Detailed report"
+    
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.test_results = []
+        # Per-status totals kept alongside test_results; tests log from worker threads
+        self._counts = Counter()
+        self._results_lock = threading.Lock()
+        
+        # SMOKE_CACHE=1 serves repeat GETs from a local cache while iterating
+        # on failing tests; CI leaves it unset and always hits the API
+        self.cache_enabled = False
+        if os.getenv('SMOKE_CACHE') == '1':
+            try:
+                import requests_cache
+                self.http = requests_cache.CachedSession(
+                    'smoke_cache',
+                    backend='sqlite',
+                    expire_after=60,
+                    allowable_methods=['GET']
+                )
+                self.cache_enabled = True
+            except ImportError:
+                print("⚠️  SMOKE_CACHE=1 but requests-cache is not installed; running uncached")
+        
+        if not self.cache_enabled:
+            self.http = requests.Session()
+        
+        # One keep-alive pool for every test, so only the first request pays for TLS
+        self.http.mount('https://', HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,  # room for every concurrently running check
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        ))
+    
+    def close(self):
+        """Release the pooled connections; the instance cannot run again afterwards"""
+        self.http.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    @property
+    @abstractmethod
+    def tests(self):
+        """(name, test, names it depends on), listed in dependency order"""
+    
+    def _get_uncached(self, url, **kwargs):
+        """GET that always reaches the API, even when SMOKE_CACHE is on"""
+        if self.cache_enabled:
+            # Per request, unlike cache_disabled(), which would also bypass the
+            # cache for the checks running concurrently on other threads
+            import requests_cache
+            kwargs['expire_after'] = requests_cache.DO_NOT_CACHE
+        return self.http.get(url, **kwargs)
+    
+    def log_test(self, test_name, status, message, details=None, timestamp=None):
+        """Log test result; pass timestamp to share one across a batch of results"""
+        result = {
+            'test': test_name,
+            'status': status,
+            'message': message,
+            'timestamp': timestamp or datetime.now().isoformat(),
+            'details': details
+        }
+        with self._results_lock:
+            self.test_results.append(result)
+            self._counts[status] += 1
+        
+        icon = _ICONS.get(status, "❓")
+        print(f"{icon} {test_name}: {message}")
+        
+        if details:
+            print(f"   Details: {details}")
+    
+    def _check_cors(self, test_name, path):
+        """Check that a preflight request to path returns the CORS headers"""
+        try:
+            response = self.http.options(f"{self.base_url}{path}", timeout=10)
+            
+            missing_headers = [header for header in _CORS_HEADERS if header not in response.headers]
+            
+            if not missing_headers:
+                self.log_test(
+                    test_name,
+                    "PASS",
+                    "All CORS headers present"
+                )
+                return True
+            else:
+                self.log_test(
+                    test_name,
+                    "FAIL",
+                    f"Missing headers: {missing_headers}"
+                )
+                return False
+        
+        except Exception as e:
+            self.log_test(test_name, "FAIL", f"Request failed: {str(e)}")
+            return False
+    
+    def _check_performance(self, test_name, path, budget_ms):
+        """Check that a warm GET of path answers within budget_ms"""
+        try:
+            # Throwaway request so the timing below measures a pooled keep-alive
+            # connection rather than DNS resolution and the TLS handshake
+            self._get_uncached(f"{self.base_url}{path}", timeout=10)
+            
+            start_time = time.perf_counter()
+            response = self._get_uncached(f"{self.base_url}{path}", timeout=10)
+            end_time = time.perf_counter()
+            
+            response_time = (end_time - start_time) * 1000  # ms
+            
+            if response.status_code == 200 and response_time < budget_ms:
+                self.log_test(
+                    test_name,
+                    "PASS",
+                    f"Response time acceptable",
+                    f"{response_time:.0f}ms"
+                )
+                return True
+            else:
+                self.log_test(
+                    test_name,
+                    "WARN",
+                    f"Slow response",
+                    f"{response_time:.0f}ms"
+                )
+                return False
+        
+        except Exception as e:
+            self.log_test(test_name, "FAIL", f"Request failed: {str(e)}")
+            return False
+    
+    def _run_test(self, test):
+        """Run one test, treating an unexpected exception as a failure"""
+        try:
+            return bool(test())
+        except Exception as e:
+            self.log_test(test.__name__, "FAIL", f"Test execution failed: {str(e)}")
+            return False
+    
+    def _run_dag(self, tests):
+        """Run each test once all of its dependencies have passed
+        
+        Independent tests run concurrently. Anything downstream of a failed
+        test is logged as SKIP without being called. Returns a dict of
+        name -> True/False, or None for skipped tests.
+        """
+        outcomes = {}
+        pending = list(tests)
+        running = {}
+        
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            while pending or running:
+                for node in list(pending):
+                    name, test, deps = node
+                    blocked = [dep for dep in deps if dep in outcomes and not outcomes[dep]]
+                    if blocked:
+                        pending.remove(node)
+                        outcomes[name] = None
+                        self.log_test(name, "SKIP", f"Skipped: {', '.join(blocked)} did not pass")
+                    elif all(outcomes.get(dep) for dep in deps):
+                        pending.remove(node)
+                        running[executor.submit(self._run_test, test)] = name
+                
+                if not running:
+                    if pending:
+                        raise ValueError(f"Unresolvable test dependencies: {[node[0] for node in pending]}")
+                    break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    outcomes[running.pop(future)] = future.result()
+        
+        return outcomes
+    
+    def run_all_tests(self):
+        """Run every test in `tests` and print a summary"""
+        # Each run reports on its own results; the session stays open for the next one
+        with self._results_lock:
+            self.test_results = []
+            self._counts.clear()
+        
+        print(self.START_BANNER)
+        print("=" * 60)
+        
+        outcomes = self._run_dag(self.tests)
+        
+        passed = sum(1 for outcome in outcomes.values() if outcome)
+        skipped = sum(1 for outcome in outcomes.values() if outcome is None)
+        failed = len(outcomes) - passed - skipped
+        
+        warnings = self._counts['WARN']
+        
+        print("\n" + "=" * 60)
+        print(self.RESULTS_BANNER)
+        print("=" * 60)
+        print(f"✅ Passed: {passed}")
+        print(f"❌ Failed: {failed}")
+        print(f"⚠️  Warnings: {warnings}")
+        print(f"⏭️  Skipped: {skipped}")
+        print(f"📊 Total: {len(self.test_results)}")
+        
+        if failed == 0 and skipped == 0:
+            print(f"\n{self.PASS_MESSAGE}")
+            return True
+        else:
+            print("\n" + self.FAIL_MESSAGE.format(failed=failed))
+            return False
+    
+    def generate_report(self):
+        """Generate detailed test report"""
+        report = {
+            'timestamp': datetime.now().isoformat(),
+            'base_url': self.base_url,
+            'total_tests': len(self.test_results),
+            'passed': self._counts['PASS'],
+            'failed': self._counts['FAIL'],
+            'warnings': self._counts['WARN'],
+            'tests': self.test_results
+        }
+        
+        # Encode once and hand the file a single write instead of json.dump's
+        # stream of small fragments
+        with open(self.REPORT_FILENAME, 'w') as f:
+            f.write(json.dumps(report, indent=2))
+        
+        print(f"\n📋 {self.REPORT_LABEL} saved to: {self.REPORT_FILENAME}")
+        return report
@@ -1,397 +1,542 @@
+import concurrent.futures
 import json
+import logging
 import os
+import secrets
+import traceback
 from datetime import datetime
-import uuid
+from functools import lru_cache
+
+import boto3
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# DEBUG=1 logs every event and returns tracebacks in error responses
+DEBUG = os.getenv('DEBUG') == '1'
+
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG if DEBUG else logging.INFO)
+
+def _make_http_session():
+    """Build a keep-alive session that retries failed connection attempts"""
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        # Generation POSTs are billed and not idempotent: only retry when the
+        # request never reached the server, never after a timeout or error reply
+        max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2)
+    ))
+    session.headers.update({'Content-Type': 'application/json'})
+    return session
+
+# One pooled session per upstream host, reused across warm invocations so
+# only the first call in a container pays for the TLS handshake
+_FAL_SESSION = _make_http_session()
+_GROK_SESSION = _make_http_session()
+
+_THEME_PROMPTS = {
+    'Best Of': 'Upbeat electronic podcast intro music with energetic synth melody, 128 BPM, perfect for highlighting the best moments',
+    'Conspiracy Corner': 'Dark ambient electronic music with mysterious undertones, glitch effects, and conspiracy theory vibes, 100 BPM',
+    'Media Meltdown': 'Chaotic breakbeat electronic music with news broadcast samples, media criticism energy, and distortion effects, 140 BPM',
+    'Donation Nation': 'Celebratory fanfare music with cash register sounds, applause, and triumphant horn sections, 120 BPM',
+    'Musical Mayhem': 'Experimental electronic collage with vocal chops, random beats, and unpredictable sound design, 130 BPM',
+    'Custom': 'Creative podcast background music with modern electronic elements, suitable for audio mixing, 125 BPM'
+}
+_DEFAULT_PROMPT = _THEME_PROMPTS['Custom']
+
+# Upstream error pages are only echoed for debugging, so read no more than this
+_ERROR_TEXT_LIMIT = 4096
+
+def _error_text(response):
+    """Read the start of a streamed error body and release the connection"""
+    try:
+        return response.raw.read(_ERROR_TEXT_LIMIT, decode_content=True).decode('utf-8', 'replace')
+    finally:
+        response.close()
 
 def get_music_prompt_for_theme(theme):
     """Generate music prompts based on theme"""
-    prompts = {
-        'Best Of': 'Upbeat electronic podcast intro music with energetic synth melody, 128 BPM, perfect for highlighting the best moments',
-        'Conspiracy Corner': 'Dark ambient electronic music with mysterious undertones, glitch effects, and conspiracy theory vibes, 100 BPM',
-        'Media Meltdown': 'Chaotic breakbeat electronic music with news broadcast samples, media criticism energy, and distortion effects, 140 BPM',
-        'Donation Nation': 'Celebratory fanfare music with cash register sounds, applause, and triumphant horn sections, 120 BPM',
-        'Musical Mayhem': 'Experimental electronic collage with vocal chops, random beats, and unpredictable sound design, 130 BPM',
-        'Custom': 'Creative podcast background music with modern electronic elements, suitable for audio mixing, 125 BPM'
-    }
-    
-    return prompts.get(theme, prompts['Custom'])
+    return _THEME_PROMPTS.get(theme, _DEFAULT_PROMPT)
 
-def generate_music_with_fal(prompt):
+def generate_music_with_fal(prompt, now=None):
     """Generate music using FAL.ai API"""
     try:
         # Get FAL API key from environment (loaded from secrets)
         fal_key = os.getenv('FAL_API_KEY')
         if not fal_key:
-            print("FAL_API_KEY not available")
+            logger.warning("FAL_API_KEY not available")
             raise Exception("FAL_API_KEY not configured")
         
-        import requests
+        result = _request_fal_music(fal_key, prompt)
+        
+        return {
+            'id': secrets.token_hex(16),
+            'prompt': prompt,
+            'created_at': now or datetime.utcnow().isoformat(),
+            'status': 'completed',
+            'audio_url': result.get('audio_url') or result.get('audio', {}).get('url'),
+            'duration': 30,
+            'fal_response': result
+        }
+            
+    except Exception as e:
+        logger.error("Error calling FAL.ai: %s", e)
+        raise e
+
+# Prompts come from the small theme table, so a warm container sees the same
+# few prompts again and again; errors raise and are never cached
+@lru_cache(maxsize=64)
+def _request_fal_music(fal_key, prompt):
+    """Call FAL.ai and return its decoded response"""
+    logger.info("Generating music with FAL.ai: %s", prompt)
+    
+    # FAL.ai API call using the correct endpoint
+    headers = {
+        'Authorization': f'Key {fal_key}'
+    }
+    
+    payload = {
+        'prompt': prompt,
+        'duration': 30
+    }
+    
+    # Use the correct FAL.ai endpoint for music generation
+    response = _FAL_SESSION.post(
+        'https://fal.run/fal-ai/stable-audio',
+        headers=headers,
+        json=payload,
+        stream=True,
+        timeout=120  # Increased timeout for music generation
+    )
+    
+    logger.debug("FAL.ai response status: %s", response.status_code)
+    
+    if response.status_code != 200:
+        error_text = _error_text(response)
+        logger.error("FAL.ai API error: %s - %s", response.status_code, error_text)
+        raise Exception(f"FAL.ai API error: {response.status_code} - {error_text}")
+    
+    result = response.json()
+    logger.debug("FAL.ai success: %s", result)
+    
+    return result
+
+def generate_ideas_with_grok(episode_number, theme, now=None):
+    """Generate mix ideas using GROK AI"""
+    try:
+        # Get GROK API key from environment (loaded from secrets)
+        grok_key = os.getenv('GROK_API_KEY')
+        if not grok_key:
+            logger.warning("GROK_API_KEY not available")
+            raise Exception("GROK_API_KEY not configured")
+        
+        ideas, summary = _request_grok_ideas(grok_key, episode_number, theme)
         
-        print(f"Generating music with FAL.ai: {prompt}")
+        return {
+            'id': secrets.token_hex(16),
+            'episode_number': episode_number,
+            'theme': theme,
+            'created_at': now or datetime.utcnow().isoformat(),
+            'status': 'completed',
+            'ideas': ideas,
+            'grok_response': summary
+        }
+            
+    except Exception as e:
+        logger.error("Error calling GROK: %s", e)
+        raise e
+
+@lru_cache(maxsize=64)
+def _request_grok_ideas(grok_key, episode_number, theme):
+    """Call GROK and return (ideas, response model/usage summary)"""
+    logger.info("Generating ideas with GROK for Episode %s, Theme: %s", episode_number, theme)
+    
+    # GROK AI API call
+    headers = {
+        'Authorization': f'Bearer {grok_key}'
+    }
+    
+    prompt = f"""Create creative mix ideas for No Agenda Episode {episode_number} with theme "{theme}".
+    
+    Generate 3 types of ideas:
+    1. Mix Concept: Overall creative vision for the mix
+    2. Segment Ideas: 5-6 specific segments with timestamps (spread throughout 3-hour show)
+    3. Music Prompts: 3 AI music prompts that would complement this theme
+    
+    Be specific, creative, and capture the No Agenda podcast vibe. Include timestamps like 1:22:30 format.
+    
+    Return as JSON:
+    {{
+        "mix_concept": "...",
+        "segments": [
+            {{"name": "...", "timestamp": "HH:MM:SS", "duration": 15, "description": "..."}},
+            ...
+        ],
+        "music_prompts": ["...", "...", "..."]
+    }}
+    """
+    
+    payload = {
+        'messages': [
+            {'role': 'user', 'content': prompt}
+        ],
+        'model': _GROK_MODEL,
+        'response_format': {'type': 'json_object'},
+        'temperature': 0.8
+    }
+    
+    response = _GROK_SESSION.post(
+        _GROK_URL,
+        headers=headers,
+        json=payload,
+        stream=True,
+        timeout=60
+    )
+    
+    logger.debug("GROK response status: %s", response.status_code)
+    
+    if response.status_code != 200:
+        error_text = _error_text(response)
+        logger.error("GROK API error: %s - %s", response.status_code, error_text)
+        raise Exception(f"GROK API error: {response.status_code} - {error_text}")
+    
+    result = response.json()
+    content = result['choices'][0]['message']['content']
+    ideas = json.loads(content)
+    # Only the metadata is echoed back; the completion itself is already in ideas
+    summary = {'model': result.get('model'), 'usage': result.get('usage')}
+    
+    logger.info("GROK success: Generated ideas")
+    
+    return ideas, summary
+
+def generate_ideas_and_music(episode_number, theme, now=None):
+    """Run the GROK and FAL.ai generators concurrently
+    
+    Both calls are network-bound, so total time is the slower of the two
+    rather than their sum. Returns (ideas, music, errors); a failed call
+    yields None and its message under errors['ideas'] or errors['music'].
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        futures = {
+            'ideas': executor.submit(generate_ideas_with_grok, episode_number, theme, now),
+            'music': executor.submit(generate_music_with_fal, get_music_prompt_for_theme(theme), now)
+        }
+    
+    results = {}
+    errors = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            errors[name] = str(e)
+    
+    return results.get('ideas'), results.get('music'), errors
+
+_IN_LAMBDA = bool(os.getenv('AWS_LAMBDA_FUNCTION_NAME'))
+
+# Created once per container; only Lambda loads secrets, so local runs
+# don't need an AWS region configured just to import this module
+_SM = boto3.client('secretsmanager') if _IN_LAMBDA else None
+
+# Secret key/value pairs from the last successful fetch; reused by warm invocations
+_SECRETS_CACHE = None
+
+def _resolve_grok_config():
+    """Read the GROK endpoint and model overrides, which the secret may supply"""
+    global _GROK_URL, _GROK_MODEL
+    _GROK_URL = os.getenv('GROK_API_URL', 'https://api.x.ai/v1') + '/chat/completions'
+    _GROK_MODEL = os.getenv('GROK_MODEL', 'grok-2-1212')
+
+# Environment values until a secrets load succeeds and re-resolves them
+_resolve_grok_config()
+
+def load_secrets():
+    """Load secrets from AWS Secrets Manager"""
+    global _SECRETS_CACHE
+    
+    if _SECRETS_CACHE is not None:
+        os.environ.update(_SECRETS_CACHE)
+        return
+    
+    if _IN_LAMBDA:
+        try:
+            secret_response = _SM.get_secret_value(
+                SecretId='no-agenda-mixer/api-keys'
+            )
+            
+            secret_values = json.loads(secret_response['SecretString'])
+            
+            # Set environment variables
+            os.environ.update(secret_values)
+            logger.debug("Loaded %d secrets", len(secret_values))
+            _resolve_grok_config()
+            
+            _SECRETS_CACHE = secret_values
+                
+        except Exception as e:
+            logger.error("Failed to load secrets: %s", e)
+
+# Fetch during Lambda's init phase, before the first invocation is timed
+load_secrets()
+
+def _dumps(obj):
+    """Serialize a response body as compact UTF-8 JSON"""
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+def _error_body(error):
+    """Serialize an error response; the traceback is only included when DEBUG is on"""
+    body = {'error': error}
+    if DEBUG:
+        body['traceback'] = traceback.format_exc()
+    return _dumps(body)
+
+def _parse_body(event):
+    """Decode the request body into a dict; None if it is not a JSON object"""
+    body = event.get('body')
+    if body is None or body == '':
+        return {}
+    if isinstance(body, dict):
+        return body
+    try:
+        parsed = json.loads(body)
+    except (TypeError, ValueError):
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+# Shared by every response; API Gateway only reads them, so one instance is safe
+_JSON_CORS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+_PREFLIGHT_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+}
+
+def _handle_health(event, now):
+    """Report health and which API keys are configured"""
+    return {
+        'statusCode': 200,
+        'headers': _JSON_CORS,
+        'body': _dumps({
+            'status': 'healthy',
+            'timestamp': now,
+            'has_grok_key': bool(os.getenv('GROK_API_KEY')),
+            'has_fal_key': bool(os.getenv('FAL_API_KEY'))
+        })
+    }
+
+def _handle_test_grok(event, now):
+    """Test GROK AI directly - simple version"""
+    try:
+        grok_key = os.getenv('GROK_API_KEY')
+        if not grok_key:
+            raise Exception("GROK_API_KEY not available")
         
-        # FAL.ai API call using the correct endpoint
         headers = {
-            'Authorization': f'Key {fal_key}',
-            'Content-Type': 'application/json'
+            'Authorization': f'Bearer {grok_key}'
         }
         
         payload = {
-            'prompt': prompt,
-            'duration': 30
+            'messages': [
+                {'role': 'user', 'content': 'Hello! Generate a simple test response for No Agenda Episode 1779.'}
+            ],
+            'model': 'grok-2-1212',
+            'temperature': 0.7
         }
         
-        # Use the correct FAL.ai endpoint for music generation
-        response = requests.post(
-            'https://fal.run/fal-ai/stable-audio',
+        response = _GROK_SESSION.post(
+            'https://api.x.ai/v1/chat/completions',
             headers=headers,
             json=payload,
-            timeout=120  # Increased timeout for music generation
+            stream=True,
+            timeout=30
         )
         
-        print(f"FAL.ai response status: {response.status_code}")
-        
         if response.status_code == 200:
             result = response.json()
-            print(f"FAL.ai success: {result}")
-            
             return {
-                'id': str(uuid.uuid4()),
-                'prompt': prompt,
-                'created_at': datetime.utcnow().isoformat(),
-                'status': 'completed',
-                'audio_url': result.get('audio_url') or result.get('audio', {}).get('url'),
-                'duration': 30,
-                'fal_response': result
+                'statusCode': 200,
+                'headers': _JSON_CORS,
+                'body': _dumps({
+                    'status': 'success',
+                    'grok_response': result
+                })
             }
         else:
-            error_text = response.text
-            print(f"FAL.ai API error: {response.status_code} - {error_text}")
-            raise Exception(f"FAL.ai API error: {response.status_code} - {error_text}")
+            return {
+                'statusCode': 500,
+                'headers': _JSON_CORS,
+                'body': _dumps({
+                    'error': f'GROK API error: {response.status_code}',
+                    'response_text': _error_text(response)
+                })
+            }
             
     except Exception as e:
-        print(f"Error calling FAL.ai: {e}")
-        raise e
+        return {
+            'statusCode': 500,
+            'headers': _JSON_CORS,
+            'body': _error_body(str(e))
+        }
 
-def generate_ideas_with_grok(episode_number, theme):
-    """Generate mix ideas using GROK AI"""
+def _handle_test_fal(event, now):
+    """Test FAL.ai directly - simple version"""
     try:
-        # Get GROK API key from environment (loaded from secrets)
-        grok_key = os.getenv('GROK_API_KEY')
-        if not grok_key:
-            print("GROK_API_KEY not available")
-            raise Exception("GROK_API_KEY not configured")
-        
-        import requests
+        fal_key = os.getenv('FAL_API_KEY')
+        if not fal_key:
+            raise Exception("FAL_API_KEY not available")
         
-        print(f"Generating ideas with GROK for Episode {episode_number}, Theme: {theme}")
+        prompt = _THEME_PROMPTS['Media Meltdown']
         
-        # GROK AI API call
         headers = {
-            'Authorization': f'Bearer {grok_key}',
-            'Content-Type': 'application/json'
+            'Authorization': f'Key {fal_key}'
         }
         
-        prompt = f"""Create creative mix ideas for No Agenda Episode {episode_number} with theme "{theme}".
-        
-        Generate 3 types of ideas:
-        1. Mix Concept: Overall creative vision for the mix
-        2. Segment Ideas: 5-6 specific segments with timestamps (spread throughout 3-hour show)
-        3. Music Prompts: 3 AI music prompts that would complement this theme
-        
-        Be specific, creative, and capture the No Agenda podcast vibe. Include timestamps like 1:22:30 format.
-        
-        Return as JSON:
-        {{
-            "mix_concept": "...",
-            "segments": [
-                {{"name": "...", "timestamp": "HH:MM:SS", "duration": 15, "description": "..."}},
-                ...
-            ],
-            "music_prompts": ["...", "...", "..."]
-        }}
-        """
-        
         payload = {
-            'messages': [
-                {'role': 'user', 'content': prompt}
-            ],
-            'model': os.getenv('GROK_MODEL', 'grok-2-1212'),
-            'response_format': {'type': 'json_object'},
-            'temperature': 0.8
+            'prompt': prompt,
+            'duration': 30
         }
         
-        response = requests.post(
-            f"{os.getenv('GROK_API_URL', 'https://api.x.ai/v1')}/chat/completions",
+        response = _FAL_SESSION.post(
+            'https://fal.run/fal-ai/stable-audio',
             headers=headers,
             json=payload,
-            timeout=60
+            stream=True,
+            timeout=120  # Music generation takes longer
         )
         
-        print(f"GROK response status: {response.status_code}")
-        
         if response.status_code == 200:
             result = response.json()
-            content = result['choices'][0]['message']['content']
-            ideas = json.loads(content)
             
-            print(f"GROK success: Generated ideas")
+            # Extract the audio URL from FAL.ai response
+            audio_url = result.get('audio_file', {}).get('url') if 'audio_file' in result else result.get('audio_url')
             
             return {
-                'id': str(uuid.uuid4()),
-                'episode_number': episode_number,
-                'theme': theme,
-                'created_at': datetime.utcnow().isoformat(),
-                'status': 'completed',
-                'ideas': ideas,
-                'grok_response': result
+                'statusCode': 200,
+                'headers': _JSON_CORS,
+                'body': _dumps({
+                    'status': 'success',
+                    'fal_response': result,
+                    'prompt': prompt,
+                    'audio_url': audio_url,
+                    'duration': 30
+                })
             }
         else:
-            error_text = response.text
-            print(f"GROK API error: {response.status_code} - {error_text}")
-            raise Exception(f"GROK API error: {response.status_code} - {error_text}")
+            return {
+                'statusCode': 500,
+                'headers': _JSON_CORS,
+                'body': _dumps({
+                    'error': f'FAL.ai API error: {response.status_code}',
+                    'response_text': _error_text(response),
+                    'prompt': prompt
+                })
+            }
             
     except Exception as e:
-        print(f"Error calling GROK: {e}")
-        raise e
+        return {
+            'statusCode': 500,
+            'headers': _JSON_CORS,
+            'body': _error_body(str(e))
+        }
 
-def load_secrets():
-    """Load secrets from AWS Secrets Manager"""
-    if os.getenv('AWS_LAMBDA_FUNCTION_NAME'):
-        try:
-            import boto3
-            secrets_client = boto3.client('secretsmanager')
-            
-            secret_response = secrets_client.get_secret_value(
-                SecretId='no-agenda-mixer/api-keys'
-            )
-            
-            secrets = json.loads(secret_response['SecretString'])
-            
-            # Set environment variables
-            for key, value in secrets.items():
-                os.environ[key] = value
-                print(f"Loaded secret: {key}")
-                
-        except Exception as e:
-            print(f"Failed to load secrets: {e}")
+def _handle_test_all(event, now):
+    """Test GROK and FAL.ai together - both calls in flight at once"""
+    body = _parse_body(event)
+    if body is None:
+        return {
+            'statusCode': 400,
+            'headers': _JSON_CORS,
+            'body': _dumps({'error': 'Request body must be a JSON object'})
+        }
+    
+    episode_number = body.get('episode_number', 1779)
+    theme = body.get('theme', 'Media Meltdown')
+    
+    ideas, music, errors = generate_ideas_and_music(episode_number, theme, now)
+    
+    return {
+        'statusCode': 500 if len(errors) == 2 else 200,
+        'headers': _JSON_CORS,
+        'body': _dumps({
+            'status': 'partial' if errors else 'success',
+            'ideas': ideas,
+            'music': music,
+            'errors': errors
+        })
+    }
+
+# The endpoint list never changes, so it is serialized once at import
+_DEFAULT_BODY = _dumps({
+    'message': 'API Test Endpoints',
+    'endpoints': [
+        'GET /health',
+        'POST /test/grok',
+        'POST /test/fal',
+        'POST /test/all'
+    ]
+})
+
+def _handle_default(event, now):
+    """List the available test endpoints"""
+    return {
+        'statusCode': 200,
+        'headers': _JSON_CORS,
+        'body': _DEFAULT_BODY
+    }
+
+# (method, path) -> handler(event, now); anything else gets the endpoint list
+_ROUTES = {
+    ('GET', '/health'): _handle_health,
+    ('POST', '/test/grok'): _handle_test_grok,
+    ('POST', '/test/fal'): _handle_test_fal,
+    ('POST', '/test/all'): _handle_test_all
+}
 
 def lambda_handler(event, context):
     """Simple Lambda handler for testing APIs"""
     
     try:
-        # Load secrets from AWS Secrets Manager
-        load_secrets()
-        
-        # Log the event
-        print(f"Event: {json.dumps(event)}")
-        
-        # Handle CORS preflight requests
-        if event.get('httpMethod') == 'OPTIONS':
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-                },
-                'body': ''
-            }
+        # Normally loaded at import; retry only if that fetch failed
+        if _SECRETS_CACHE is None:
+            load_secrets()
         
-        # Simple routing
         path = event.get('path', '/')
         method = event.get('httpMethod', 'GET')
         
+        # One timestamp per invocation, shared by everything this request returns
+        now = datetime.utcnow().isoformat()
+        
+        # Monitors poll /health constantly; answer before any event logging
         if path == '/health' and method == 'GET':
+            return _handle_health(event, now)
+        
+        # Encoding the whole event is only worth it when debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Event: %s", json.dumps(event))
+        
+        # Handle CORS preflight requests
+        if method == 'OPTIONS':
             return {
                 'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'status': 'healthy',
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'has_grok_key': bool(os.getenv('GROK_API_KEY')),
-                    'has_fal_key': bool(os.getenv('FAL_API_KEY'))
-                })
+                'headers': _PREFLIGHT_HEADERS,
+                'body': ''
             }
         
-        elif path == '/test/grok' and method == 'POST':
-            # Test GROK AI directly - simple version
-            try:
-                import requests
-                
-                grok_key = os.getenv('GROK_API_KEY')
-                if not grok_key:
-                    raise Exception("GROK_API_KEY not available")
-                
-                headers = {
-                    'Authorization': f'Bearer {grok_key}',
-                    'Content-Type': 'application/json'
-                }
-                
-                payload = {
-                    'messages': [
-                        {'role': 'user', 'content': 'Hello! Generate a simple test response for No Agenda Episode 1779.'}
-                    ],
-                    'model': 'grok-2-1212',
-                    'temperature': 0.7
-                }
-                
-                response = requests.post(
-                    'https://api.x.ai/v1/chat/completions',
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return {
-                        'statusCode': 200,
-                        'headers': {
-                            'Content-Type': 'application/json',
-                            'Access-Control-Allow-Origin': '*'
-                        },
-                        'body': json.dumps({
-                            'status': 'success',
-                            'grok_response': result
-                        })
-                    }
-                else:
-                    return {
-                        'statusCode': 500,
-                        'headers': {
-                            'Content-Type': 'application/json',
-                            'Access-Control-Allow-Origin': '*'
-                        },
-                        'body': json.dumps({
-                            'error': f'GROK API error: {response.status_code}',
-                            'response_text': response.text
-                        })
-                    }
-                    
-            except Exception as e:
-                import traceback
-                return {
-                    'statusCode': 500,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({
-                        'error': str(e),
-                        'traceback': traceback.format_exc()
-                    })
-                }
-        
-        elif path == '/test/fal' and method == 'POST':
-            # Test FAL.ai directly - simple version
-            try:
-                import requests
-                
-                fal_key = os.getenv('FAL_API_KEY')
-                if not fal_key:
-                    raise Exception("FAL_API_KEY not available")
-                
-                prompt = "Chaotic breakbeat electronic music with news broadcast samples, media criticism energy, and distortion effects, 140 BPM"
-                
-                headers = {
-                    'Authorization': f'Key {fal_key}',
-                    'Content-Type': 'application/json'
-                }
-                
-                payload = {
-                    'prompt': prompt,
-                    'duration': 30
-                }
-                
-                response = requests.post(
-                    'https://fal.run/fal-ai/stable-audio',
-                    headers=headers,
-                    json=payload,
-                    timeout=120  # Music generation takes longer
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    
-                    # Extract the audio URL from FAL.ai response
-                    audio_url = result.get('audio_file', {}).get('url') if 'audio_file' in result else result.get('audio_url')
-                    
-                    return {
-                        'statusCode': 200,
-                        'headers': {
-                            'Content-Type': 'application/json',
-                            'Access-Control-Allow-Origin': '*'
-                        },
-                        'body': json.dumps({
-                            'status': 'success',
-                            'fal_response': result,
-                            'prompt': prompt,
-                            'audio_url': audio_url,
-                            'duration': 30
-                        })
-                    }
-                else:
-                    return {
-                        'statusCode': 500,
-                        'headers': {
-                            'Content-Type': 'application/json',
-                            'Access-Control-Allow-Origin': '*'
-                        },
-                        'body': json.dumps({
-                            'error': f'FAL.ai API error: {response.status_code}',
-                            'response_text': response.text,
-                            'prompt': prompt
-                        })
-                    }
-                    
-            except Exception as e:
-                import traceback
-                return {
-                    'statusCode': 500,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({
-                        'error': str(e),
-                        'traceback': traceback.format_exc()
-                    })
-                }
-        
-        # Default response
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'message': 'API Test Endpoints',
-                'endpoints': [
-                    'GET /health',
-                    'POST /test/grok',
-                    'POST /test/fal'
-                ]
-            })
-        }
+        handler = _ROUTES.get((method, path), _handle_default)
+        return handler(event, now)
     
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Lambda handler error: {str(e)}")
-        print(f"Full traceback: {error_details}")
+        # Unexpected failures keep their traceback in the logs either way
+        logger.exception("Lambda handler error")
         
         return {
             'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'error': f'Internal server error: {str(e)}',
-                'traceback': error_details
-            })
+            'headers': _JSON_CORS,
+            'body': _error_body(f'Internal server error: {str(e)}')
         }
\ No newline at end of file
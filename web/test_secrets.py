@@ -2,7 +2,7 @@
 """
 Test AWS Secrets Manager retrieval
 """
-from secrets_manager import SecretsManager
+from secrets_manager import get_secrets_manager
 import json
 
 def test_secrets():
@@ -10,8 +10,7 @@ def test_secrets():
     print("🔐 Testing AWS Secrets Manager retrieval...\n")
     
     try:
-        sm = SecretsManager()
-        secrets = sm.get_secret('no-agenda-mixer/api-keys')
+        secrets = get_secrets_manager().get_secret('no-agenda-mixer/api-keys')
         
         print("✅ Successfully retrieved secrets!")
         print("\n📋 Secret keys found:")